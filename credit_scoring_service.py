@@ -0,0 +1,365 @@
+"""
+Serviço de Escoragem de Crédito - Módulo 02
+Laboratório de Mercado Financeiro
+
+Serviço HTTP local, sem Streamlit, que carrega o modelo registrado pelo Módulo 02 e escora
+lotes em JSON ou Arrow. Requisições concorrentes de uma única operação são agrupadas
+(micro-batching) em uma só chamada a predict_proba.
+
+Uso:
+    python credit_scoring_service.py serve --port 8502 --max-batch 256 --max-wait-ms 2
+    python credit_scoring_service.py load --concurrency 32 --requests 5000 --batch-sizes 1,16,256
+
+Endpoints:
+    POST /score    uma operação {"loan_amnt": ...}, um lote {"loans": [...]} ou um lote Arrow
+                   (Content-Type: application/vnd.apache.arrow.stream)
+    GET  /metrics  latência (p50/p95/p99), vazão e tamanho médio dos micro-lotes
+    GET  /health   modelo carregado, variáveis e cut-off
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+from module_02_credit_risk import apply_calibration, load_credit_frame, load_registered_model, score_applications
+
+
+ARROW_CONTENT_TYPE = 'application/vnd.apache.arrow.stream'
+
+
+# =============================================================================
+# MÉTRICAS
+# =============================================================================
+
+class ServiceMetrics:
+    """Latências recentes (janela móvel), contadores e tamanhos de micro-lote, protegidos por um lock"""
+
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+
+    def record_request(self, latency, n_rows):
+        with self.lock:
+            self.latencies.append(latency)
+            self.requests += 1
+            self.rows += n_rows
+
+    def record_batch(self, size):
+        with self.lock:
+            self.batch_sizes.append(size)
+
+    def record_error(self):
+        with self.lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            latencies = np.array(self.latencies)
+            batch_sizes = np.array(self.batch_sizes)
+            elapsed = time.perf_counter() - self.started
+            summary = {
+                'requests': self.requests,
+                'rows': self.rows,
+                'errors': self.errors,
+                'uptime_s': elapsed,
+                'requests_per_s': self.requests / elapsed,
+                'rows_per_s': self.rows / elapsed
+            }
+
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+            summary.update(latency_ms={'p50': p50, 'p95': p95, 'p99': p99, 'mean': latencies.mean() * 1000})
+        if len(batch_sizes):
+            summary.update(micro_batches=len(batch_sizes), mean_batch_size=batch_sizes.mean())
+
+        return summary
+
+
+# =============================================================================
+# ESCORAGEM COM MICRO-BATCHING
+# =============================================================================
+
+class MicroBatcher:
+    """
+    Fila de operações individuais escoradas por uma única thread: a cada ciclo, junta tudo o que
+    chegar até `max_batch` operações ou `max_wait_ms` após a primeira, e faz uma só chamada a
+    predict_proba para o lote. Cada requisição recebe seu resultado por um Future.
+    """
+
+    def __init__(self, registered, metrics, max_batch=256, max_wait_ms=2.0):
+        self.registered = registered
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.pending = queue.Queue()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, row):
+        """Enfileira uma operação (vetor na ordem das variáveis do modelo)"""
+        future = Future()
+        self.pending.put((row, future))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.perf_counter() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            rows, futures = zip(*batch)
+            try:
+                results = score_batch(self.registered, np.vstack(rows))
+            except Exception as exc:
+                for future in futures:
+                    future.set_exception(exc)
+                continue
+
+            self.metrics.record_batch(len(batch))
+            for i, future in enumerate(futures):
+                future.set_result({key: values[i] for key, values in results.items()})
+
+
+def score_batch(registered, X):
+    """Escora uma matriz (linhas × variáveis do modelo) com a lógica de decisão do Módulo 02"""
+    X = pd.DataFrame(X, columns=registered['features'])
+    proba, decision = score_applications(registered['model'], X, registered['cutoff'])
+
+    results = {'pd': proba, 'decisao': np.where(decision == 1, 'NEGAR', 'APROVAR')}
+    if registered['calibrator'] is not None:
+        method, calibrators = registered['calibrator']
+        results['pd_calibrada'] = apply_calibration(calibrators, method, proba)
+
+    return results
+
+
+def to_json_records(results):
+    """Resultados colunares (arrays) para uma lista de objetos JSON"""
+    columns = {key: np.asarray(values).tolist() for key, values in results.items()}
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+# =============================================================================
+# SERVIDOR HTTP
+# =============================================================================
+
+def make_handler(registered, batcher, metrics):
+    """Handler HTTP/1.1 (conexões persistentes) ligado ao modelo, ao micro-batcher e às métricas"""
+    features = registered['features']
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, body, content_type='application/json', status=200):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, payload, status=200):
+            self.send_body(json.dumps(payload).encode(), status=status)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self.send_json(metrics.snapshot())
+            elif self.path == '/health':
+                self.send_json({
+                    'features': features,
+                    'cutoff': registered['cutoff'],
+                    'calibration': None if registered['calibrator'] is None else registered['calibrator'][0],
+                    'registered_at': registered['registered_at']
+                })
+            else:
+                self.send_json({'error': 'rota não encontrada'}, status=404)
+
+        def do_POST(self):
+            if self.path != '/score':
+                self.send_json({'error': 'rota não encontrada'}, status=404)
+                return
+
+            start = time.perf_counter()
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+            try:
+                if self.headers.get('Content-Type') == ARROW_CONTENT_TYPE:
+                    n_rows = self.score_arrow(body)
+                else:
+                    n_rows = self.score_json(json.loads(body))
+            except (KeyError, ValueError, TypeError) as exc:
+                metrics.record_error()
+                self.send_json({'error': f'entrada inválida: {exc}'}, status=400)
+                return
+            except Exception as exc:
+                # Falha do lote ou do modelo: o cliente recebe 500 em JSON em vez de uma conexão encerrada
+                metrics.record_error()
+                self.send_json({'error': f'falha na escoragem: {exc}'}, status=500)
+                return
+
+            metrics.record_request(time.perf_counter() - start, n_rows)
+
+        def score_json(self, payload):
+            # Uma operação: vai para o micro-batcher; um lote já amortiza o custo por requisição
+            if 'loans' not in payload:
+                row = np.array([payload[f] for f in features], dtype=np.float64)
+                self.send_json(batcher.submit(row).result())
+                return 1
+
+            X = np.array([[loan[f] for f in features] for loan in payload['loans']], dtype=np.float64)
+            self.send_json({'results': to_json_records(score_batch(registered, X))})
+            return len(X)
+
+        def score_arrow(self, body):
+            import pyarrow as pa
+
+            table = pa.ipc.open_stream(body).read_all()
+            X = np.column_stack([table.column(f).to_numpy() for f in features])
+            results = pa.table(score_batch(registered, X))
+
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, results.schema) as writer:
+                writer.write_table(results)
+            self.send_body(sink.getvalue().to_pybytes(), content_type=ARROW_CONTENT_TYPE)
+            return len(X)
+
+    return ScoringHandler
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """Uma thread por conexão; fila de conexões maior que o padrão (5) para rajadas de clientes"""
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def serve(host='127.0.0.1', port=8502, max_batch=256, max_wait_ms=2.0, model_name='credit_model'):
+    """Carrega o modelo registrado e atende até ser interrompido (Ctrl+C)"""
+    registered = load_registered_model(model_name)
+    metrics = ServiceMetrics()
+    batcher = MicroBatcher(registered, metrics, max_batch, max_wait_ms)
+
+    server = ScoringServer((host, port), make_handler(registered, batcher, metrics))
+    print(f"Escorando com {registered['features']} (cut-off {registered['cutoff']:.2%}) em http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# =============================================================================
+# GERADOR DE CARGA
+# =============================================================================
+
+def request_json(connection, method, path, payload=None):
+    """Uma requisição JSON em uma conexão persistente"""
+    body = None if payload is None else json.dumps(payload)
+    connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+    return json.loads(connection.getresponse().read())
+
+
+def run_load(url, loans, n_requests, concurrency, batch_size):
+    """
+    Dispara `n_requests` requisições de `batch_size` operações a partir de `concurrency` clientes,
+    cada um com sua conexão persistente. Retorna as latências medidas no cliente e o tempo total.
+    """
+    target = urlparse(url)
+    per_client = int(np.ceil(n_requests / concurrency))
+
+    def client(worker):
+        connection = HTTPConnection(target.hostname, target.port)
+        latencies = []
+        for i in range(per_client):
+            start_row = ((worker * per_client + i) * batch_size) % max(len(loans) - batch_size, 1)
+            batch = loans[start_row:start_row + batch_size]
+            payload = batch[0] if batch_size == 1 else {'loans': batch}
+
+            start = time.perf_counter()
+            request_json(connection, 'POST', '/score', payload)
+            latencies.append(time.perf_counter() - start)
+        connection.close()
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.concatenate([np.array(lat) for lat in pool.map(client, range(concurrency))])
+    return latencies, time.perf_counter() - start
+
+
+def load_test(url='http://127.0.0.1:8502', n_requests=5000, concurrency=32, batch_sizes=(1, 16, 256),
+              source='testing_sample_true.csv'):
+    """Mede latência e custo por operação em função do tamanho do lote, com o serviço já no ar"""
+    target = urlparse(url)
+    connection = HTTPConnection(target.hostname, target.port)
+    features = request_json(connection, 'GET', '/health')['features']
+
+    loans = load_credit_frame(source, columns=features).astype(np.float64).to_dict('records')
+
+    print(f"{'lote':>6} {'req/s':>10} {'operações/s':>12} {'p50 (ms)':>10} {'p99 (ms)':>10} {'µs/operação':>12}")
+    for batch_size in batch_sizes:
+        latencies, elapsed = run_load(url, loans, n_requests, concurrency, batch_size)
+        rows = len(latencies) * batch_size
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(f"{batch_size:>6} {len(latencies) / elapsed:>10.0f} {rows / elapsed:>12.0f} "
+              f"{p50:>10.2f} {p99:>10.2f} {elapsed / rows * 1e6:>12.1f}")
+
+    server_metrics = request_json(connection, 'GET', '/metrics')
+    connection.close()
+    print(f"Tamanho médio dos micro-lotes no servidor: {server_metrics.get('mean_batch_size', 0):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP de escoragem do Módulo 02")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="inicia o serviço com o modelo registrado")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8502)
+    serve_parser.add_argument('--max-batch', type=int, default=256)
+    serve_parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    serve_parser.add_argument('--model', default='credit_model')
+
+    load_parser = commands.add_parser('load', help="gerador de carga contra um serviço em execução")
+    load_parser.add_argument('--url', default='http://127.0.0.1:8502')
+    load_parser.add_argument('--requests', type=int, default=5000)
+    load_parser.add_argument('--concurrency', type=int, default=32)
+    load_parser.add_argument('--batch-sizes', default='1,16,256')
+    load_parser.add_argument('--source', default='testing_sample_true.csv')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.host, args.port, args.max_batch, args.max_wait_ms, args.model)
+    else:
+        batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+        load_test(args.url, args.requests, args.concurrency, batch_sizes, args.source)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,14 +8,31 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_curve, auc
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.isotonic import IsotonicRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score, f1_score, brier_score_loss
 from sklearn.preprocessing import StandardScaler
+from joblib import Parallel, delayed, Memory, cpu_count, dump, load, hash as joblib_hash
+from scipy import stats
+from scipy.special import expit, logit, ndtr, ndtri
+from scipy.linalg import cho_factor, cho_solve, LinAlgError
+from itertools import combinations, islice
+from concurrent.futures import ProcessPoolExecutor
+import math
+import multiprocessing
+import os
+import shutil
+import tracemalloc
+import time
+import uuid
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import warnings
+from pathlib import Path
 warnings.filterwarnings('ignore')
 
 
@@ -53,20 +70,2385 @@ variable_descriptions = {
     'loan_status': 'Status atual da operação de crédito: operação de crédito em dia (loan_status = 0); operação de crédito em atraso (loan_status = 1)'
 }
 
+# Esquema de tipos compactos dos arquivos de crédito.
+# As variáveis categóricas (grade, sub_grade, home_ownership, addr_state, ...) já vêm
+# codificadas como inteiros, então int8 guarda apenas o código da categoria e mantém
+# as colunas numéricas para o modelo.
+CREDIT_SCHEMA = {
+    'id': 'int32',
+    'loan_amnt': 'float32',
+    'funded_amnt': 'float32',
+    'term': 'int8',
+    'int_rate': 'float32',
+    'installment': 'float32',
+    'grade': 'int8',
+    'sub_grade': 'int8',
+    'home_ownership': 'int8',
+    'verification_status': 'int8',
+    'purpose': 'int8',
+    'addr_state': 'int8',
+    'dti': 'float32',
+    'earliest_cr_line': 'int16',
+    'revol_util': 'float32',
+    'initial_list_status': 'int8',
+    'application_type': 'int8',
+    'acc_open_past_24mths': 'float32',
+    'avg_cur_bal': 'float32',
+    'bc_open_to_buy': 'float32',
+    'bc_util': 'float32',
+    'mo_sin_old_rev_tl_op': 'float32',
+    'mo_sin_rcnt_rev_tl_op': 'float32',
+    'mort_acc': 'float32',
+    'num_actv_rev_tl': 'float32',
+    'log_annual_inc': 'float32',
+    'fico_score': 'float32',
+    'loan_status': 'int8'
+}
+
+# Diretório do cache colunar (Parquet) dos arquivos de crédito
+CACHE_DIR = Path('.cache') / 'm02'
+
+# Matrizes numéricas de treinamento mapeadas em memória (uma pasta por versão dos dados)
+FEATURE_STORE_DIR = CACHE_DIR / 'matrix'
+
+# Registro do modelo publicado para o serviço de escoragem (credit_scoring_service.py)
+MODEL_REGISTRY_DIR = CACHE_DIR / 'registry'
+
+# Monitores de drift, uma pasta por sessão; pastas sem atividade há mais que o prazo são removidas
+DRIFT_DIR = CACHE_DIR / 'drift'
+DRIFT_SESSION_TTL_HOURS = 24
+
+# Carteira de treinamento sintética (credit_synthetic_data.py), usada quando não há training_sample.csv
+SYNTHETIC_TRAINING_FILE = CACHE_DIR / 'synthetic' / 'training.parquet'
+
+# Variáveis sugeridas ao abrir o módulo
+DEFAULT_FEATURES = ['loan_amnt', 'int_rate', 'log_annual_inc', 'fico_score', 'funded_amnt']
+
+# Arquivos sem rótulo que são apenas uma projeção de outro arquivo (armazenados uma única vez)
+UNLABELED_VIEWS = {
+    'testing_sample.csv': 'testing_sample_true.csv'
+}
+
+# Variáveis categóricas nominais (códigos sem ordem): no WoE, cada categoria é uma faixa
+NOMINAL_FEATURES = ['home_ownership', 'verification_status', 'purpose', 'addr_state', 'initial_list_status', 'application_type']
+
+# Variáveis usadas nos cortes de desempenho por segmento
+SEGMENT_FEATURES = ['addr_state', 'grade', 'purpose', 'home_ownership']
+
+# Motores comparados no benchmark de modelagem
+BENCHMARK_ENGINES = [
+    'Logística (lbfgs)',
+    'Logística (newton-cholesky)',
+    'Logística (saga)',
+    'Logística (liblinear)',
+    'HistGradientBoosting'
+]
+
+
+# =============================================================================
+# FUNÇÕES AUXILIARES (fora do render para permitir caching)
+# =============================================================================
+
+def read_credit_csv(csv_path):
+    """Lê um CSV de crédito aplicando o esquema de tipos compactos"""
+    header = pd.read_csv(csv_path, index_col=0, nrows=0).columns
+    dtypes = {col: CREDIT_SCHEMA[col] for col in header if col in CREDIT_SCHEMA}
+    df = pd.read_csv(csv_path, index_col=0, dtype=dtypes)
+    
+    # Colunas fora do esquema também são reduzidas para o menor tipo que as comporta
+    for col in df.columns.difference(list(dtypes)):
+        if pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='float')
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    
+    return df.reset_index(drop=True)
+
+
+def load_credit_frame(csv_path, columns=None):
+    """
+    Carrega um arquivo de crédito a partir do cache Parquet, sem reprocessar o CSV.
+    O cache é reconstruído sempre que o CSV for mais recente que ele.
+    """
+    csv_path = Path(csv_path)
+    
+    # Arquivos sem rótulo são lidos do cache do arquivo rotulado, sem a coluna alvo
+    if csv_path.name in UNLABELED_VIEWS:
+        labeled = load_credit_frame(csv_path.with_name(UNLABELED_VIEWS[csv_path.name]), columns)
+        return labeled.drop(columns='loan_status', errors='ignore')
+    
+    cache_path = CACHE_DIR / f"{csv_path.stem}.parquet"
+    
+    if cache_path.exists() and (not csv_path.exists() or cache_path.stat().st_mtime >= csv_path.stat().st_mtime):
+        return pd.read_parquet(cache_path, columns=columns)
+    
+    df = read_credit_csv(csv_path)
+    
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(cache_path, index=False)
+    except (ImportError, OSError):
+        # Sem pyarrow ou sem permissão de escrita: segue com o CSV já processado
+        pass
+    
+    return df if columns is None else df[columns]
+
+
+# Cache em disco dos modelos ajustados em cada fold (compartilhado entre processos e sessões)
+fold_memory = Memory(CACHE_DIR / 'joblib', verbose=0)
+
+
+def using_synthetic_training():
+    """A carteira sintética substitui o training_sample.csv ausente"""
+    return not Path('training_sample.csv').exists() and SYNTHETIC_TRAINING_FILE.exists()
+
+
+def split_synthetic_source(data):
+    """
+    Divide a amostra rotulada (estratificada, fixa) em uma metade para ajustar o gerador sintético
+    e outra, nunca vista pelo gerador, usada como produção quando o treinamento é sintético.
+    """
+    fit_idx, holdout_idx = train_test_split(
+        np.arange(len(data)), test_size=0.5, random_state=42, stratify=data['loan_status']
+    )
+    return data.iloc[np.sort(fit_idx)].reset_index(drop=True), data.iloc[np.sort(holdout_idx)].reset_index(drop=True)
+
+
+@st.cache_resource
+def load_data():
+    """Carrega os dados de treinamento e produção (compartilhados entre sessões, não devem ser alterados)"""
+    try:
+        production_data = load_credit_frame('testing_sample_true.csv')
+        if using_synthetic_training():
+            # Produção restrita à metade que o gerador não viu: sem vazamento dos rótulos para o treino
+            training_data = pd.read_parquet(SYNTHETIC_TRAINING_FILE)
+            _, production_data = split_synthetic_source(production_data)
+        else:
+            training_data = load_credit_frame('training_sample.csv')
+        return training_data, production_data
+    except FileNotFoundError:
+        st.error(
+            "Arquivos CSV não encontrados. Certifique-se de que 'training_sample.csv' e 'testing_sample_true.csv' "
+            "estão no diretório correto, ou gere uma carteira de treinamento sintética com "
+            "`python credit_synthetic_data.py --training-rows 20000`."
+        )
+        return None, None
+
+
+def split_feature_matrix(training_data):
+    """
+    Matriz numérica de treinamento em column-major (float32), com as linhas já na ordem da
+    divisão 70/30: primeiro o treino, depois o teste. Assim X_train e X_test de qualquer
+    conjunto de variáveis são fatias contíguas de cada coluna.
+    """
+    features = [col for col in training_data.columns if col not in ('id', 'loan_status')]
+    y = training_data['loan_status'].to_numpy()
+    
+    train_idx, test_idx = train_test_split(
+        np.arange(len(y)), test_size=0.3, random_state=42, stratify=y
+    )
+    order = np.concatenate([train_idx, test_idx])
+    
+    X = np.empty((len(order), len(features)), dtype=np.float32, order='F')
+    for j, feature in enumerate(features):
+        X[:, j] = training_data[feature].to_numpy()[order]
+    
+    return features, X, y[order], len(train_idx)
+
+
+def write_feature_store(training_data, store_dir):
+    """Grava a matriz de treinamento em .npy (uma única vez por versão dos dados)"""
+    features, X, y, n_train = split_feature_matrix(training_data)
+    
+    # Grava em uma pasta temporária e renomeia: outra sessão nunca lê uma matriz pela metade
+    tmp_dir = store_dir.with_name(f"{store_dir.name}.{os.getpid()}.tmp")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    np.save(tmp_dir / 'X.npy', X)
+    np.save(tmp_dir / 'y.npy', y)
+    np.savez(tmp_dir / 'meta.npz', features=np.array(features), n_train=n_train)
+    
+    try:
+        tmp_dir.replace(store_dir)
+    except OSError:
+        # Outra sessão gravou a mesma versão primeiro: usa a dela
+        for path in tmp_dir.iterdir():
+            path.unlink()
+        tmp_dir.rmdir()
+
+
+@st.cache_resource(show_spinner=False)
+def get_feature_store():
+    """
+    Matriz de treinamento mapeada em memória (np.load com mmap_mode='r'), compartilhada entre
+    sessões e processos: todos leem as mesmas páginas do arquivo em vez de cópias próprias.
+    """
+    training_data, _ = load_data()
+    store_dir = FEATURE_STORE_DIR / joblib_hash(training_data)
+    
+    try:
+        if not store_dir.exists():
+            write_feature_store(training_data, store_dir)
+        X = np.load(store_dir / 'X.npy', mmap_mode='r')
+        y = np.load(store_dir / 'y.npy', mmap_mode='r')
+        meta = np.load(store_dir / 'meta.npz')
+        features, n_train = list(meta['features']), int(meta['n_train'])
+    except OSError:
+        # Sem permissão de escrita: a mesma matriz, mantida em memória
+        features, X, y, n_train = split_feature_matrix(training_data)
+    
+    return {'X': X, 'y': y, 'columns': {f: j for j, f in enumerate(features)}, 'n_train': n_train}
+
+
+def feature_view(store, features, rows):
+    """DataFrame de visões sem cópia das colunas `features` no intervalo de linhas `rows`"""
+    return pd.DataFrame(
+        {f: store['X'][rows, store['columns'][f]] for f in features}, copy=False
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def fit_logistic_model(selected_features):
+    """
+    Treina o modelo de regressão logística na divisão 70/30 (cacheado por conjunto de variáveis).
+    X e y são visões da matriz mapeada em memória: nenhuma cópia dos dados por conjunto de variáveis.
+    """
+    store = get_feature_store()
+    train_rows, test_rows = slice(0, store['n_train']), slice(store['n_train'], None)
+    
+    X_train = feature_view(store, selected_features, train_rows)
+    X_test = feature_view(store, selected_features, test_rows)
+    y_train = pd.Series(store['y'][train_rows], name='loan_status', copy=False)
+    y_test = pd.Series(store['y'][test_rows], name='loan_status', copy=False)
+    
+    model = LogisticRegression(random_state=42, max_iter=1000)
+    model.fit(X_train, y_train)
+    
+    return model, X_train, X_test, y_train, y_test
+
+
+def spd_inverse(matrix):
+    """Inversa de uma matriz simétrica positiva definida via Cholesky (pseudo-inversa se for singular)"""
+    try:
+        return cho_solve(cho_factor(matrix), np.eye(len(matrix)))
+    except LinAlgError:
+        return np.linalg.pinv(matrix)
+
+
+def fit_logistic_mle(X_design, y, max_iter=50, tol=1e-8):
+    """
+    Máxima verossimilhança (sem penalização) da regressão logística por Newton/IRLS: cada passo
+    resolve X'WX · Δβ = X'(y - p) com a mesma fatoração de Cholesky da informação de Fisher.
+    As colunas são padronizadas durante as iterações e os coeficientes voltam à escala original.
+    Retorna (β, convergiu).
+    """
+    mean = np.r_[0.0, X_design[:, 1:].mean(axis=0)]
+    std = np.r_[1.0, X_design[:, 1:].std(axis=0)]
+    std[std == 0] = 1.0
+    Z = (X_design - mean) / std
+    
+    beta = np.zeros(Z.shape[1])
+    beta[0] = logit(np.clip(y.mean(), 1e-6, 1 - 1e-6))
+    
+    def log_likelihood(b):
+        eta = Z @ b
+        return np.sum(y * eta - np.logaddexp(0, eta))
+    
+    current = log_likelihood(beta)
+    converged = False
+    
+    for _ in range(max_iter):
+        proba = expit(Z @ beta)
+        fisher = (Z * (proba * (1 - proba))[:, None]).T @ Z
+        try:
+            step = cho_solve(cho_factor(fisher), Z.T @ (y - proba))
+        except LinAlgError:
+            break
+        
+        # Passo de Newton com meia-redução se a verossimilhança piorar (separação, má escala)
+        for _ in range(30):
+            candidate = log_likelihood(beta + step)
+            if candidate >= current - 1e-12:
+                break
+            step /= 2
+        
+        beta, current = beta + step, candidate
+        
+        if np.max(np.abs(step)) < tol:
+            converged = True
+            break
+    
+    # Volta à escala original: β_j = b_j / σ_j e intercepto = b_0 - Σ b_j μ_j / σ_j
+    slopes = beta[1:] / std[1:]
+    return np.r_[beta[0] - slopes @ mean[1:], slopes], converged
+
+
+@st.cache_data(show_spinner=False)
+def compute_coefficient_inference(selected_features):
+    """
+    Inferência de Wald para os coeficientes: erros padrão, estatística z, p-valores, intervalos
+    de confiança de 95% e fatores de inflação da variância (VIF).
+    O modelo do app usa a penalização L2 padrão do scikit-learn, cujo ajuste não é a máxima
+    verossimilhança; por isso os coeficientes são reestimados sem penalização (Newton/IRLS) e a
+    covariância é a inversa da informação de Fisher X'WX avaliada nessa estimativa.
+    Retorna (tabela, convergiu). Cacheado junto com o modelo, pelo mesmo conjunto de variáveis.
+    """
+    _, X_train, _, y_train, _ = fit_logistic_model(selected_features)
+    
+    X = X_train.to_numpy(dtype=np.float64)
+    X_design = np.column_stack([np.ones(len(X)), X])
+    beta, converged = fit_logistic_mle(X_design, y_train.to_numpy(dtype=np.float64))
+    
+    # Informação de Fisher em um único produto ponderado: X' diag(p(1-p)) X
+    proba = expit(X_design @ beta)
+    weights = proba * (1 - proba)
+    fisher = (X_design * weights[:, None]).T @ X_design
+    
+    covariance = spd_inverse(fisher)
+    
+    std_error = np.sqrt(np.diag(covariance))
+    z_stat = beta / std_error
+    z_crit = stats.norm.ppf(0.975)
+    
+    # VIF: diagonal da inversa da matriz de correlação das variáveis
+    if X.shape[1] > 1:
+        vif = np.diag(spd_inverse(np.corrcoef(X, rowvar=False)))
+    else:
+        vif = np.ones(1)
+    
+    inference_df = pd.DataFrame({
+        'Coeficiente (MV)': beta,
+        'Erro Padrão': std_error,
+        'Estatística z': z_stat,
+        'p-valor': 2 * stats.norm.sf(np.abs(z_stat)),
+        'IC 95% Inferior': beta - z_crit * std_error,
+        'IC 95% Superior': beta + z_crit * std_error,
+        'VIF': np.r_[np.nan, vif]
+    }, index=['Intercepto'] + list(selected_features))
+    
+    return inference_df, converged
+
+
+# =============================================================================
+# VALIDAÇÃO CRUZADA E INTERVALOS DE CONFIANÇA POR BOOTSTRAP
+# =============================================================================
+
+def weighted_auc(y_true, y_score, weights):
+    """
+    AUC pela estatística de Mann-Whitney (postos) para uma ou várias ponderações da amostra.
+    Os scores são ordenados uma única vez; cada linha de `weights` é uma reamostragem.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score)
+    
+    # Ordenação única e grupos de empates (scores iguais recebem meio ponto)
+    order = np.argsort(y_score, kind='mergesort')
+    sorted_scores = y_score[order]
+    starts = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])
+    
+    w = np.atleast_2d(weights)[:, order]
+    is_pos = y_true[order]
+    
+    pos = np.add.reduceat(w * is_pos, starts, axis=1)
+    neg = np.add.reduceat(w * ~is_pos, starts, axis=1)
+    neg_below = np.cumsum(neg, axis=1) - neg
+    
+    n_pos = pos.sum(axis=1)
+    n_neg = neg.sum(axis=1)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (pos * (neg_below + 0.5 * neg)).sum(axis=1) / (n_pos * n_neg)
+
+
+@fold_memory.cache
+def fit_fold_model(X, y, train_idx):
+    """Ajusta o modelo de um fold (cacheado em disco pelo conteúdo dos dados e índices)"""
+    model = LogisticRegression(random_state=42, max_iter=1000)
+    model.fit(X[train_idx], y[train_idx])
+    return model
+
+
+def evaluate_fold(X, y, train_idx, test_idx, cutoff):
+    """Avalia um fold da validação cruzada"""
+    model = fit_fold_model(X, y, train_idx)
+    proba = model.predict_proba(X[test_idx])[:, 1]
+    y_pred = (proba > cutoff).astype(int)
+    
+    return {
+        'AUC': roc_auc_score(y[test_idx], proba),
+        'Acurácia': accuracy_score(y[test_idx], y_pred),
+        'F1-Score': f1_score(y[test_idx], y_pred, zero_division=0)
+    }
+
+
+@st.cache_data(show_spinner=False)
+def run_cross_validation(selected_features, n_splits, cutoff):
+    """Validação cruzada estratificada k-fold com os folds ajustados em paralelo"""
+    training_data, _ = load_data()
+    X = training_data[list(selected_features)].to_numpy()
+    y = training_data['loan_status'].to_numpy()
+    
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+    
+    fold_results = Parallel(n_jobs=-1)(
+        delayed(evaluate_fold)(X, y, train_idx, test_idx, cutoff)
+        for train_idx, test_idx in skf.split(X, y)
+    )
+    
+    folds_df = pd.DataFrame(fold_results)
+    folds_df.index = [f"Fold {i + 1}" for i in range(n_splits)]
+    return folds_df
+
+
+def bootstrap_chunk(y_true, y_score, cutoff, n_boot, seed):
+    """Calcula AUC, acurácia e F1 para um bloco de reamostragens bootstrap"""
+    rng = np.random.default_rng(seed)
+    n = len(y_true)
+    
+    # Cada linha conta quantas vezes cada observação foi sorteada
+    weights = rng.multinomial(n, np.full(n, 1 / n), size=n_boot).astype(np.float64)
+    
+    y_true = np.asarray(y_true).astype(bool)
+    y_pred = np.asarray(y_score) > cutoff
+    
+    tp = weights @ (y_pred & y_true)
+    fp = weights @ (y_pred & ~y_true)
+    fn = weights @ (~y_pred & y_true)
+    
+    accuracy = weights @ (y_pred == y_true) / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f1 = np.nan_to_num(2 * tp / (2 * tp + fp + fn))
+    
+    return np.column_stack([weighted_auc(y_true, y_score, weights), accuracy, f1])
+
+
+@st.cache_data(show_spinner=False)
+def bootstrap_metrics(y_true, y_score, cutoff, n_boot=1000, seed=42, chunk_size=100):
+    """Distribuição bootstrap das métricas de teste, com os blocos processados em paralelo"""
+    y_true = np.asarray(y_true)
+    y_score = np.asarray(y_score)
+    
+    sizes = [min(chunk_size, n_boot - start) for start in range(0, n_boot, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    
+    chunks = Parallel(n_jobs=-1)(
+        delayed(bootstrap_chunk)(y_true, y_score, cutoff, size, chunk_seed)
+        for size, chunk_seed in zip(sizes, seeds)
+    )
+    
+    return pd.DataFrame(np.vstack(chunks), columns=['AUC', 'Acurácia', 'F1-Score'])
+
+
+def display_validation_panel(selected_features, y_test, y_pred_proba_test, cutoff):
+    """Função para exibir o painel de validação cruzada e bootstrap"""
+    st.subheader("🧪 Validação Cruzada e Intervalos de Confiança")
+    
+    st.markdown("""
+    Uma única divisão 70/30 produz **uma** estimativa de AUC, sujeita ao acaso da amostra sorteada.
+    A validação cruzada repete o treinamento em *k* divisões diferentes e o bootstrap reamostra o
+    conjunto de teste para medir a incerteza das métricas.
+    """)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        n_splits = st.slider("Número de folds (k)", min_value=3, max_value=10, value=5, key="m02_cv_folds")
+    
+    with col2:
+        n_boot = st.slider("Reamostragens bootstrap (B)", min_value=200, max_value=5000, value=1000, step=100, key="m02_n_boot")
+    
+    if st.button("▶️ Executar Validação", key="m02_btn_validation"):
+        st.session_state['m02_validation_ready'] = True
+    
+    if not st.session_state.get('m02_validation_ready'):
+        st.info("👆 Clique no botão acima para executar a validação cruzada e o bootstrap.")
+        return
+    
+    with st.spinner('🔄 Executando validação cruzada e bootstrap...'):
+        folds_df = run_cross_validation(tuple(selected_features), n_splits, cutoff)
+        boot_df = bootstrap_metrics(y_test, y_pred_proba_test, cutoff, n_boot)
+    
+    # Intervalo t de Student para a média dos folds
+    t_crit = stats.t.ppf(0.975, n_splits - 1)
+    half_width = t_crit * folds_df.std() / np.sqrt(n_splits)
+    
+    cv_summary = pd.DataFrame({
+        'Média': folds_df.mean(),
+        'Desvio Padrão': folds_df.std(),
+        'IC 95% Inferior': folds_df.mean() - half_width,
+        'IC 95% Superior': folds_df.mean() + half_width
+    })
+    
+    boot_summary = pd.DataFrame({
+        'Média': boot_df.mean(),
+        'Desvio Padrão': boot_df.std(),
+        'IC 95% Inferior': boot_df.quantile(0.025),
+        'IC 95% Superior': boot_df.quantile(0.975)
+    })
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.write(f"**Validação Cruzada Estratificada ({n_splits} folds):**")
+        st.dataframe(cv_summary.round(4), use_container_width=True)
+    
+    with col2:
+        st.write(f"**Bootstrap do Conjunto de Teste ({n_boot} reamostragens):**")
+        st.dataframe(boot_summary.round(4), use_container_width=True)
+    
+    with st.expander("📋 Resultados por Fold"):
+        st.dataframe(folds_df.round(4), use_container_width=True)
+    
+    fig = go.Figure()
+    fig.add_trace(histogram_bar(
+        boot_df['AUC'],
+        bins=40,
+        name='AUC Bootstrap',
+        marker_color='steelblue',
+        opacity=0.8
+    ))
+    
+    for q in [0.025, 0.975]:
+        fig.add_vline(x=boot_df['AUC'].quantile(q), line_dash="dash", line_color="red")
+    
+    fig.update_layout(
+        title='Distribuição Bootstrap da AUC de Teste (IC 95% em vermelho)',
+        xaxis_title='AUC',
+        yaxis_title='Frequência',
+        height=400
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+    
+    with st.expander("💡 Como interpretar"):
+        st.markdown("""
+        **Validação Cruzada**: cada fold é usado uma vez como teste e o modelo é treinado nos demais.
+        A média dos folds é uma estimativa mais estável do desempenho fora da amostra.
+        
+        **Bootstrap**: o conjunto de teste é reamostrado com reposição B vezes. A dispersão das
+        métricas mostra quanto da diferença entre dois modelos pode ser apenas ruído amostral.
+        
+        **Intervalo de Confiança**: se os intervalos de dois modelos se sobrepõem bastante,
+        não há evidência forte de que um seja melhor que o outro.
+        """)
+
+
+# =============================================================================
+# BUSCA AUTOMÁTICA DE SUBCONJUNTOS DE VARIÁVEIS
+# =============================================================================
+
+def dataset_fingerprint(*arrays):
+    """Hash do conteúdo dos dados (chave de cache estável entre sessões e processos)"""
+    return joblib_hash(arrays)
+
+
+def fit_warm_logistic(X, y, init=None):
+    """Ajusta a regressão logística partindo de coeficientes iniciais [intercepto, coeficientes]"""
+    model = LogisticRegression(max_iter=1000, warm_start=init is not None)
+    
+    if init is not None:
+        model.intercept_ = np.array(init[:1], dtype=float)
+        model.coef_ = np.array(init[None, 1:], dtype=float)
+    
+    model.fit(X, y)
+    return model
+
+
+@fold_memory.cache(ignore=['X', 'y', 'folds', 'warm_start'])
+def evaluate_feature_subset(data_hash, subset, n_splits, X, y, folds, warm_start=None):
+    """
+    AUC média da validação cruzada e BIC de um subconjunto de variáveis (índices das colunas de X).
+    O resultado é cacheado pelo hash dos dados, subconjunto e número de folds.
+    """
+    X_subset = X[:, list(subset)]
+    
+    fold_coefs = []
+    aucs = []
+    
+    for k, (train_idx, test_idx) in enumerate(folds):
+        init = None if warm_start is None else warm_start[k]
+        model = fit_warm_logistic(X_subset[train_idx], y[train_idx], init)
+        aucs.append(roc_auc_score(y[test_idx], model.decision_function(X_subset[test_idx])))
+        fold_coefs.append(np.r_[model.intercept_, model.coef_[0]])
+    
+    fold_coefs = np.array(fold_coefs)
+    
+    # BIC no conjunto completo, partindo da média dos coeficientes dos folds
+    full_model = fit_warm_logistic(X_subset, y, fold_coefs.mean(axis=0))
+    proba = np.clip(full_model.predict_proba(X_subset)[:, 1], 1e-12, 1 - 1e-12)
+    log_likelihood = np.sum(y * np.log(proba) + (1 - y) * np.log(1 - proba))
+    bic = -2 * log_likelihood + (len(subset) + 1) * np.log(len(y))
+    
+    return {'subset': subset, 'auc': np.mean(aucs), 'bic': bic, 'coefs': fold_coefs}
+
+
+def expand_warm_start(parent, child):
+    """Reorganiza os coeficientes de um subconjunto pai para o subconjunto filho (novas variáveis começam em zero)"""
+    if parent is None:
+        return None
+    
+    position = {feature: i + 1 for i, feature in enumerate(parent['subset'])}
+    coefs = np.zeros((parent['coefs'].shape[0], len(child) + 1))
+    coefs[:, 0] = parent['coefs'][:, 0]
+    
+    for j, feature in enumerate(child):
+        if feature in position:
+            coefs[:, j + 1] = parent['coefs'][:, position[feature]]
+    
+    return coefs
+
+
+def search_feature_subsets(X, y, feature_names, method='forward', max_features=5, criterion='AUC',
+                           n_splits=3, time_budget=60, progress_callback=None):
+    """
+    Busca de subconjuntos de até k variáveis (`max_features`) por seleção progressiva (forward),
+    eliminação regressiva (backward, que elimina até chegar a k e depois só enquanto o critério
+    melhora) ou melhor subconjunto. Os candidatos de cada etapa são ajustados em paralelo, com
+    partida a quente a partir do subconjunto pai.
+    
+    Retorna (ranking, concluída): ranking dos subconjuntos avaliados e se a busca terminou dentro
+    do orçamento de tempo.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    n_features = X.shape[1]
+    
+    # Padronização: melhora a convergência e torna as partidas a quente mais eficazes
+    std = X.std(axis=0)
+    X = (X - X.mean(axis=0)) / np.where(std > 0, std, 1)
+    
+    data_hash = dataset_fingerprint(X, y)
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42).split(X, y))
+    batch_size = 4 * cpu_count()
+    
+    evaluated = {}
+    start_time = time.perf_counter()
+    
+    def score(result):
+        return result['auc'] if criterion == 'AUC' else -result['bic']
+    
+    if method == 'forward':
+        total = sum(n_features - i for i in range(min(max_features, n_features)))
+    elif method == 'backward':
+        total = n_features * (n_features + 1) // 2
+    else:
+        total = sum(math.comb(n_features, k) for k in range(1, max_features + 1))
+    
+    def evaluate(subsets, parents):
+        """
+        Avalia candidatos em lotes paralelos; retorna False se o orçamento de tempo acabar.
+        Candidatos e pais são consumidos sob demanda, lote a lote (aceita geradores).
+        """
+        pending = ((subset, parent) for subset, parent in zip(subsets, parents) if subset not in evaluated)
+        
+        for batch in iter(lambda: list(islice(pending, batch_size)), []):
+            if time.perf_counter() - start_time > time_budget:
+                return False
+            
+            results = Parallel(n_jobs=-1)(
+                delayed(evaluate_feature_subset)(
+                    data_hash, subset, n_splits, X, y, folds, expand_warm_start(parent, subset)
+                )
+                for subset, parent in batch
+            )
+            
+            for result in results:
+                evaluated[result['subset']] = result
+            
+            if progress_callback is not None:
+                progress_callback(
+                    min(len(evaluated) / total, 1.0),
+                    f"{len(evaluated)} subconjuntos avaliados em {time.perf_counter() - start_time:.1f}s"
+                )
+        
+        return True
+    
+    finished = True
+    
+    if method == 'forward':
+        current = None
+        
+        while current is None or len(current['subset']) < min(max_features, n_features):
+            chosen = () if current is None else current['subset']
+            candidates = [tuple(sorted(chosen + (j,))) for j in range(n_features) if j not in chosen]
+            
+            if not evaluate(candidates, [current] * len(candidates)):
+                finished = False
+                break
+            
+            best = max((evaluated[c] for c in candidates), key=score)
+            if current is not None and score(best) <= score(current):
+                break
+            current = best
+    
+    elif method == 'backward':
+        full = tuple(range(n_features))
+        finished = evaluate([full], [None])
+        current = evaluated.get(full)
+        
+        while finished and len(current['subset']) > 1:
+            candidates = [tuple(f for f in current['subset'] if f != j) for j in current['subset']]
+            
+            if not evaluate(candidates, [current] * len(candidates)):
+                finished = False
+                break
+            
+            # Acima de k variáveis a eliminação é obrigatória; até k, só continua se o critério melhorar
+            best = max((evaluated[c] for c in candidates), key=score)
+            if score(best) <= score(current) and len(current['subset']) <= max_features:
+                break
+            current = best
+    
+    else:
+        # Subconjuntos em ordem crescente de tamanho: o pai (sem a última variável) já foi avaliado.
+        # As combinações são geradas sob demanda, sem materializar C(n, k) tuplas de uma vez.
+        for k in range(1, min(max_features, n_features) + 1):
+            candidates = combinations(range(n_features), k)
+            parents = (evaluated.get(c[:-1]) for c in combinations(range(n_features), k))
+            
+            if not evaluate(candidates, parents):
+                finished = False
+                break
+    
+    ranking = pd.DataFrame([
+        {
+            'Variáveis': ', '.join(feature_names[i] for i in result['subset']),
+            'Nº Variáveis': len(result['subset']),
+            'AUC (CV)': result['auc'],
+            'BIC': result['bic']
+        }
+        for result in evaluated.values()
+        if len(result['subset']) <= max_features
+    ])
+    
+    if not ranking.empty:
+        ranking = ranking.sort_values(
+            'AUC (CV)' if criterion == 'AUC' else 'BIC',
+            ascending=criterion != 'AUC'
+        ).reset_index(drop=True)
+        ranking.index = ranking.index + 1
+    
+    return ranking, finished
+
+
+def apply_feature_subset(features):
+    """Callback que aplica um subconjunto encontrado à seleção de variáveis do modelo"""
+    st.session_state['m02_selected_features'] = list(features)
+
+
+def display_feature_search(training_data, available_features):
+    """Função para exibir a busca automática de subconjuntos de variáveis"""
+    st.markdown("""
+    Em vez de escolher as variáveis manualmente, a busca avalia subconjuntos candidatos por
+    validação cruzada (AUC) e pelo critério de informação bayesiano (BIC), que penaliza modelos
+    com muitas variáveis.
+    """)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        method_label = st.selectbox(
+            "Método de busca:",
+            ['Seleção progressiva (forward)', 'Eliminação regressiva (backward)', 'Melhor subconjunto (até k variáveis)'],
+            key="m02_search_method"
+        )
+        criterion = st.radio("Critério de ordenação:", ['AUC', 'BIC'], horizontal=True, key="m02_search_criterion")
+    
+    with col2:
+        max_features = st.slider("Número máximo de variáveis (k)", min_value=1, max_value=10, value=5, key="m02_search_k")
+        time_budget = st.slider("Orçamento de tempo (segundos)", min_value=10, max_value=300, value=60, step=10, key="m02_search_budget")
+    
+    method = {
+        'Seleção progressiva (forward)': 'forward',
+        'Eliminação regressiva (backward)': 'backward',
+        'Melhor subconjunto (até k variáveis)': 'best'
+    }[method_label]
+    
+    if st.button("🔎 Buscar Subconjuntos", key="m02_btn_search"):
+        progress_bar = st.progress(0.0, text="Iniciando a busca...")
+        
+        ranking, finished = search_feature_subsets(
+            training_data[available_features],
+            training_data['loan_status'],
+            available_features,
+            method=method,
+            max_features=max_features,
+            criterion=criterion,
+            time_budget=time_budget,
+            progress_callback=lambda fraction, message: progress_bar.progress(fraction, text=message)
+        )
+        
+        progress_bar.empty()
+        st.session_state['m02_search_results'] = (ranking, finished)
+    
+    if 'm02_search_results' not in st.session_state:
+        return
+    
+    ranking, finished = st.session_state['m02_search_results']
+    
+    if ranking.empty:
+        st.warning(f"⚠️ Nenhum subconjunto de até {max_features} variáveis foi avaliado dentro do orçamento de tempo.")
+        return
+    
+    if not finished:
+        st.warning("⏱️ Orçamento de tempo esgotado: o ranking mostra os subconjuntos avaliados até o momento.")
+    
+    st.dataframe(ranking.head(20).round(4), use_container_width=True)
+    
+    best_features = ranking.iloc[0]['Variáveis'].split(', ')
+    st.button(
+        f"✅ Usar o melhor subconjunto ({len(best_features)} variáveis)",
+        on_click=apply_feature_subset,
+        args=(best_features,),
+        key="m02_btn_apply_subset"
+    )
+
+
+# =============================================================================
+# CAMINHO DE REGULARIZAÇÃO
+# =============================================================================
+
+@st.cache_data(show_spinner=False)
+def compute_regularization_path(selected_features, penalty='L2', l1_ratio=0.5, n_values=30):
+    """
+    Ajusta o modelo sobre uma grade de valores de C, do mais regularizado ao menos regularizado.
+    Cada ajuste parte da solução anterior (warm start), o que reduz as iterações em relação a
+    ajustes independentes (cerca de 2 a 4 vezes menos); ainda assim, o caminho custa o equivalente
+    a vários ajustes isolados, sobretudo com o saga (L1/Elastic-Net). Só os ajustes são
+    cronometrados; a AUC de validação é calculada depois. Cacheado por conjunto de variáveis e
+    tipo de penalidade.
+    """
+    _, X_train, X_test, y_train, y_test = fit_logistic_model(selected_features)
+    
+    # Padronização: coeficientes comparáveis entre si e convergência mais rápida
+    scaler = StandardScaler().fit(X_train)
+    X_train_scaled = scaler.transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    
+    ratio = {'L2': 0.0, 'L1': 1.0, 'Elastic-Net': l1_ratio}[penalty]
+    solver = 'lbfgs' if ratio == 0 else 'saga'
+    
+    # Tolerância mais frouxa que o padrão (1e-4): ao longo do caminho a AUC não muda na 4ª casa,
+    # e o saga passa a aproveitar o warm start em vez de iterar até a precisão máxima em cada C
+    Cs = np.logspace(-4, 2, n_values)
+    fit_params = dict(l1_ratio=ratio, solver=solver, tol=1e-3, max_iter=500)
+    model = LogisticRegression(C=Cs[0], warm_start=True, **fit_params)
+    
+    coefs = []
+    intercepts = []
+    iterations = []
+    path_time = 0.0
+    
+    for C in Cs:
+        model.set_params(C=C)
+        start = time.perf_counter()
+        model.fit(X_train_scaled, y_train)
+        path_time += time.perf_counter() - start
+        
+        coefs.append(model.coef_[0].copy())
+        intercepts.append(model.intercept_[0])
+        iterations.append(int(np.max(model.n_iter_)))
+    
+    coef_df = pd.DataFrame(coefs, index=Cs, columns=list(selected_features))
+    
+    # Escoragem da validação fora do tempo do caminho: uma multiplicação para todos os C
+    decision = X_test_scaled @ coef_df.to_numpy().T + np.array(intercepts)
+    path_df = pd.DataFrame({
+        'C': Cs,
+        'AUC Validação': [roc_auc_score(y_test, decision[:, i]) for i in range(len(Cs))],
+        'Variáveis Ativas': (np.abs(coef_df.to_numpy()) > 1e-8).sum(axis=1),
+        'Iterações': iterations
+    })
+    
+    # Referência: um único ajuste "a frio" no melhor C, com os mesmos parâmetros
+    best_C = path_df.loc[path_df['AUC Validação'].idxmax(), 'C']
+    start = time.perf_counter()
+    LogisticRegression(C=best_C, **fit_params).fit(X_train_scaled, y_train)
+    single_fit_time = time.perf_counter() - start
+    
+    return coef_df, path_df, path_time, single_fit_time
+
+
+def plot_regularization_path(coef_df, path_df):
+    """Função para plotar os caminhos dos coeficientes e a AUC de validação em função de C"""
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=['Caminho dos Coeficientes (padronizados)', 'AUC de Validação vs C']
+    )
+    
+    for feature in coef_df.columns:
+        fig.add_trace(
+            go.Scatter(x=coef_df.index, y=coef_df[feature], mode='lines', name=feature),
+            row=1, col=1
+        )
+    
+    fig.add_trace(
+        go.Scatter(
+            x=path_df['C'],
+            y=path_df['AUC Validação'],
+            mode='lines+markers',
+            name='AUC Validação',
+            line=dict(color='black', width=2),
+            showlegend=False
+        ),
+        row=1, col=2
+    )
+    
+    best_C = path_df.loc[path_df['AUC Validação'].idxmax(), 'C']
+    for col in [1, 2]:
+        fig.add_vline(x=best_C, line_dash="dash", line_color="red", row=1, col=col)
+    
+    fig.update_xaxes(type='log', title_text="C (inverso da força de regularização)")
+    fig.update_yaxes(title_text="Coeficiente", row=1, col=1)
+    fig.update_yaxes(title_text="AUC", row=1, col=2)
+    fig.update_layout(height=500, title_text="Caminho de Regularização da Regressão Logística")
+    
+    return fig
+
+
+def display_regularization_path(selected_features):
+    """Função para exibir o modo de caminho de regularização"""
+    st.markdown("""
+    O parâmetro **C** controla a força da regularização: valores pequenos encolhem os coeficientes
+    em direção a zero, valores grandes aproximam o modelo da regressão sem penalidade.
+    """)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        penalty = st.radio("Penalidade:", ['L2', 'L1', 'Elastic-Net'], horizontal=True, key="m02_reg_penalty")
+    
+    with col2:
+        l1_ratio = st.slider(
+            "Proporção L1 (Elastic-Net)", min_value=0.1, max_value=0.9, value=0.5, step=0.1,
+            disabled=penalty != 'Elastic-Net', key="m02_reg_l1_ratio"
+        )
+    
+    with st.spinner('🔄 Calculando o caminho de regularização...'):
+        coef_df, path_df, path_time, single_fit_time = compute_regularization_path(
+            tuple(selected_features), penalty, l1_ratio
+        )
+    
+    st.plotly_chart(plot_regularization_path(coef_df, path_df), use_container_width=True)
+    
+    best = path_df.loc[path_df['AUC Validação'].idxmax()]
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Melhor C", f"{best['C']:.4g}")
+    
+    with col2:
+        st.metric("AUC de Validação no Melhor C", f"{best['AUC Validação']:.4f}")
+    
+    with col3:
+        st.metric(
+            f"Tempo do Caminho ({len(path_df)} valores de C)", f"{path_time:.2f}s",
+            help=(
+                f"Somente os ajustes (sem a escoragem). Um único ajuste sem warm start no melhor C leva "
+                f"{single_fit_time:.3f}s: o caminho equivale a cerca de {path_time / max(single_fit_time, 1e-9):.0f} ajustes isolados."
+            )
+        )
+    
+    with st.expander("📋 Detalhes do Caminho"):
+        st.dataframe(path_df.round(4), use_container_width=True)
+    
+    with st.expander("💡 Interpretação"):
+        st.markdown("""
+        **L2 (Ridge)**: encolhe todos os coeficientes de forma suave, sem zerá-los.
+        
+        **L1 (Lasso)**: zera coeficientes à medida que C diminui, funcionando como seleção de variáveis.
+        
+        **Elastic-Net**: combina as duas penalidades, útil quando há variáveis correlacionadas.
+        
+        **Warm start**: cada ajuste parte da solução do C anterior, que já está próxima da nova
+        solução, por isso o solver precisa de poucas iterações por ponto do caminho.
+        """)
+
+
+# =============================================================================
+# BENCHMARK DE SOLVERS E FAMÍLIAS DE MODELOS
+# =============================================================================
+
+def make_benchmark_engine(name):
+    """Cria o estimador de um motor do benchmark (as logísticas recebem variáveis padronizadas)"""
+    if name == 'HistGradientBoosting':
+        return HistGradientBoostingClassifier(random_state=42)
+    
+    solver = name.split('(')[1].rstrip(')')
+    return make_pipeline(StandardScaler(), LogisticRegression(solver=solver, max_iter=1000, random_state=42))
+
+
+def expected_calibration_error(y_true, y_proba, n_bins=10):
+    """Erro esperado de calibração (ECE) com faixas de probabilidade de mesma largura"""
+    return reliability_diagnostics(y_true, y_proba, n_bins)[2]
+
+
+def run_benchmark_engine(name, X_train, y_train, X_test, y_test):
+    """
+    Executa um motor do benchmark (roda em um processo separado). Os tempos são medidos com o
+    tracemalloc desligado; o pico de memória vem de uma segunda passada, não cronometrada.
+    """
+    model = make_benchmark_engine(name)
+    
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+    
+    # Repete a predição até acumular tempo suficiente para uma medida estável
+    repeats = 0
+    start = time.perf_counter()
+    while repeats == 0 or time.perf_counter() - start < 0.2:
+        y_proba = model.predict_proba(X_test)[:, 1]
+        repeats += 1
+    predict_time = (time.perf_counter() - start) / repeats
+    
+    # O rastreamento de alocações encarece cada alocação de forma desigual entre os motores
+    tracemalloc.start()
+    make_benchmark_engine(name).fit(X_train, y_train).predict_proba(X_test)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'Motor': name,
+        'Tempo de Ajuste (s)': fit_time,
+        'Predições por Segundo': len(X_test) / predict_time,
+        'Pico de Memória (MB)': peak_memory / 1e6,
+        'AUC': roc_auc_score(y_test, y_proba),
+        'Brier Score': brier_score_loss(y_test, y_proba),
+        'ECE': expected_calibration_error(y_test, y_proba)
+    }
+
+
+@st.cache_resource
+def get_benchmark_executor():
+    """Pool de processos compartilhado que executa o benchmark fora da thread da interface"""
+    return ProcessPoolExecutor(
+        max_workers=min(len(BENCHMARK_ENGINES), cpu_count()),
+        mp_context=multiprocessing.get_context('spawn')
+    )
+
+
+def display_benchmark(selected_features):
+    """Função para exibir o benchmark de solvers e famílias de modelos"""
+    st.markdown("""
+    Ajusta o **mesmo conjunto de variáveis** com diferentes solvers da regressão logística e com um
+    modelo de gradient boosting. Os ajustes rodam em um pool de processos em segundo plano, então
+    a interface continua respondendo enquanto o benchmark é executado.
+    """)
+    
+    if st.button("🏁 Iniciar Benchmark", key="m02_btn_benchmark"):
+        _, X_train, X_test, y_train, y_test = fit_logistic_model(tuple(selected_features))
+        executor = get_benchmark_executor()
+        
+        st.session_state['m02_benchmark_jobs'] = {
+            name: executor.submit(
+                run_benchmark_engine, name,
+                X_train.to_numpy(), y_train.to_numpy(), X_test.to_numpy(), y_test.to_numpy()
+            )
+            for name in BENCHMARK_ENGINES
+        }
+    
+    jobs = st.session_state.get('m02_benchmark_jobs')
+    
+    if jobs is None:
+        st.info("👆 Clique no botão acima para iniciar o benchmark.")
+        return
+    
+    pending = any(not job.done() for job in jobs.values())
+    
+    # Enquanto houver ajustes pendentes, o painel se atualiza sozinho a cada 2 segundos
+    @st.fragment(run_every=2 if pending else None)
+    def benchmark_results():
+        # O último ajuste terminou: uma execução completa recria o fragmento sem o run_every e encerra o polling
+        if pending and all(job.done() for job in jobs.values()):
+            st.rerun()
+        
+        rows = []
+        
+        for name, job in jobs.items():
+            if not job.done():
+                rows.append({'Motor': name, 'Status': '⏳ Executando'})
+            elif job.exception() is not None:
+                rows.append({'Motor': name, 'Status': f'❌ Erro: {job.exception()}'})
+            else:
+                rows.append({**job.result(), 'Status': '✅ Concluído'})
+        
+        results_df = pd.DataFrame(rows).set_index('Motor')
+        st.dataframe(results_df.round(4), use_container_width=True)
+        
+        finished = results_df[results_df['Status'] == '✅ Concluído']
+        
+        if len(finished) == len(jobs):
+            fig = make_subplots(rows=1, cols=3, subplot_titles=['Tempo de Ajuste (s)', 'AUC', 'Brier Score'])
+            
+            for col, metric in enumerate(['Tempo de Ajuste (s)', 'AUC', 'Brier Score'], start=1):
+                fig.add_trace(
+                    go.Bar(x=finished.index, y=finished[metric], name=metric, showlegend=False),
+                    row=1, col=col
+                )
+            
+            fig.update_layout(height=400, title_text="Comparação dos Motores")
+            st.plotly_chart(fig, use_container_width=True)
+        elif any(not job.done() for job in jobs.values()):
+            st.info("⏳ Benchmark em andamento... os resultados aparecem à medida que cada motor termina.")
+    
+    benchmark_results()
+    
+    with st.expander("💡 Como interpretar"):
+        st.markdown("""
+        **Tempo de Ajuste**: tempo para treinar o modelo no conjunto de treino.
+        
+        **Predições por Segundo**: vazão de escoragem no conjunto de teste.
+        
+        **Pico de Memória**: maior volume de memória alocado durante ajuste e predição.
+        
+        **Brier Score e ECE**: medem a calibração das probabilidades (quanto menor, melhor).
+        Um modelo pode ter boa AUC e probabilidades mal calibradas.
+        """)
+
+
+# =============================================================================
+# SCORECARD DE PONTOS INTEIROS
+# =============================================================================
+
+def build_scorecard(model, X_train, n_bins=10, pdo=20, base_score=600, base_odds=50):
+    """
+    Converte o modelo logístico em um scorecard de pontos inteiros com escala PDO.
+    Cada variável é dividida em faixas por quantis; os pontos de cada faixa são o log-odds de
+    bom pagador no valor médio da faixa, escalado e arredondado. O scorecard é compilado em
+    arrays de consulta: cortes por variável (no tipo da coluna) e um único vetor de pontos com
+    os deslocamentos de início e fim de cada variável.
+    """
+    factor = pdo / np.log(2)
+    offset = base_score - factor * np.log(base_odds)
+    
+    features = list(X_train.columns)
+    n_features = len(features)
+    intercept = model.intercept_[0]
+    
+    edges, points, offsets, table_rows = [], [], [], []
+    position = 0
+    
+    for j, feature in enumerate(features):
+        x = X_train[feature].to_numpy(dtype=np.float64)
+        cuts = np.unique(np.quantile(x, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        
+        # Valor representativo de cada faixa: média dos valores de treino na faixa
+        bin_idx = np.searchsorted(cuts, x, side='right')
+        counts = np.bincount(bin_idx, minlength=len(cuts) + 1)
+        sums = np.bincount(bin_idx, weights=x, minlength=len(cuts) + 1)
+        fallback = np.r_[cuts[:1], cuts] if len(cuts) else np.array([x.mean()])
+        bin_value = np.where(counts > 0, sums / np.maximum(counts, 1), fallback)
+        
+        # Intercepto e offset repartidos igualmente entre as variáveis
+        bin_points = np.round(
+            -factor * (model.coef_[0][j] * bin_value + intercept / n_features) + offset / n_features
+        ).astype(np.int32)
+        
+        # Cortes no mesmo tipo da coluna: a busca binária não precisa converter os dados
+        edges.append(cuts.astype(X_train[feature].dtype) if X_train[feature].dtype.kind == 'f' else cuts)
+        points.append(bin_points)
+        offsets.append(position)
+        position += len(bin_points)
+        
+        lower = np.r_[-np.inf, cuts]
+        upper = np.r_[cuts, np.inf]
+        for k in range(len(bin_points)):
+            table_rows.append({
+                'Variável': feature,
+                'Faixa': f"[{lower[k]:.4g}, {upper[k]:.4g})",
+                'Observações': int(counts[k]),
+                'Pontos': int(bin_points[k])
+            })
+    
+    return {
+        'features': features,
+        'edges': edges,
+        'points': np.concatenate(points),
+        'offsets': np.array(offsets + [position]),
+        'factor': factor,
+        'offset': offset,
+        'table': pd.DataFrame(table_rows)
+    }
+
+
+def score_with_scorecard(scorecard, X):
+    """Pontuação inteira por searchsorted + take em cada coluna (X pode ser DataFrame ou dicionário de arrays)"""
+    scores = None
+    
+    offsets = scorecard['offsets']
+    
+    for j, (feature, cuts) in enumerate(zip(scorecard['features'], scorecard['edges'])):
+        feature_points = scorecard['points'][offsets[j]:offsets[j + 1]]
+        column_points = feature_points.take(np.searchsorted(cuts, np.asarray(X[feature]), side='right'))
+        scores = column_points if scores is None else scores + column_points
+    
+    return scores
+
+
+def scorecard_default_probability(scorecard, scores):
+    """Probabilidade de inadimplência implícita em um score"""
+    return 1 / (1 + np.exp((np.asarray(scores) - scorecard['offset']) / scorecard['factor']))
+
+
+def probability_to_score(scorecard, probability):
+    """Score equivalente a uma probabilidade de inadimplência"""
+    return scorecard['offset'] + scorecard['factor'] * np.log((1 - probability) / probability)
+
+
+@st.cache_data(show_spinner=False)
+def get_scorecard(selected_features, n_bins=10, pdo=20, base_score=600, base_odds=50):
+    """Scorecard do modelo treinado (cacheado por conjunto de variáveis e parâmetros de escala)"""
+    model, X_train, _, _, _ = fit_logistic_model(selected_features)
+    return build_scorecard(model, X_train, n_bins, pdo, base_score, base_odds)
+
+
+def measure_scoring_throughput(model, scorecard, production_data, selected_features, n_rows):
+    """Compara a vazão do scorecard compilado com a de predict_proba em n_rows operações"""
+    reps = int(np.ceil(n_rows / len(production_data)))
+    columns = {f: np.tile(production_data[f].to_numpy(), reps)[:n_rows] for f in selected_features}
+    X_matrix = np.column_stack([columns[f] for f in selected_features])
+    
+    start = time.perf_counter()
+    score_with_scorecard(scorecard, columns)
+    scorecard_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    model.predict_proba(X_matrix)
+    proba_time = time.perf_counter() - start
+    
+    return n_rows / scorecard_time, n_rows / proba_time
+
+
+def display_scorecard(model, selected_features, X_test, y_test, production_data, cutoff):
+    """Função para exibir o scorecard de pontos"""
+    st.markdown("""
+    Mesas de crédito costumam implantar o modelo como um **scorecard**: cada variável é dividida em
+    faixas e cada faixa vale um número inteiro de pontos. O score da operação é a soma dos pontos,
+    e a escala é definida pelo **PDO** (pontos para dobrar a chance de ser bom pagador).
+    """)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        pdo = st.number_input("PDO", min_value=5, max_value=100, value=20, step=5, key="m02_sc_pdo")
+    
+    with col2:
+        base_score = st.number_input("Score Base", min_value=100, max_value=1000, value=600, step=50, key="m02_sc_base")
+    
+    with col3:
+        base_odds = st.number_input("Odds no Score Base (bom:mau)", min_value=1, max_value=1000, value=50, key="m02_sc_odds")
+    
+    with col4:
+        n_bins = st.slider("Faixas por Variável", min_value=3, max_value=20, value=10, key="m02_sc_bins")
+    
+    scorecard = get_scorecard(tuple(selected_features), n_bins, pdo, base_score, base_odds)
+    
+    test_scores = score_with_scorecard(scorecard, X_test)
+    proba_test = model.predict_proba(X_test)[:, 1]
+    score_cutoff = probability_to_score(scorecard, cutoff)
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        # Score maior = menor risco, então a AUC usa o score com sinal invertido
+        st.metric("AUC do Scorecard (Teste)", f"{roc_auc_score(y_test, -test_scores):.4f}")
+    
+    with col2:
+        st.metric("AUC do Modelo (Teste)", f"{roc_auc_score(y_test, proba_test):.4f}")
+    
+    with col3:
+        st.metric("Score de Corte Equivalente", f"{score_cutoff:.0f}", help=f"Scores abaixo deste valor correspondem a PD acima de {cutoff:.2%}")
+    
+    st.subheader("🧾 Tabela de Pontos")
+    st.dataframe(scorecard['table'], use_container_width=True, height=400)
+    
+    fig = go.Figure()
+    score_range = (test_scores.min(), test_scores.max())
+    for label, color, name in [(0, 'green', 'Bons Pagadores'), (1, 'red', 'Inadimplentes')]:
+        fig.add_trace(histogram_bar(
+            test_scores[np.asarray(y_test) == label],
+            bins=40,
+            value_range=score_range,
+            name=name,
+            marker_color=color,
+            opacity=0.6
+        ))
+    fig.add_vline(x=score_cutoff, line_dash="dash", line_color="black", annotation_text="Corte")
+    fig.update_layout(
+        title='Distribuição dos Scores no Conjunto de Teste',
+        xaxis_title='Score',
+        yaxis_title='Frequência',
+        barmode='overlay',
+        height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("⚡ Vazão de Escoragem")
+    n_rows = st.select_slider(
+        "Número de operações escoradas:",
+        options=[100_000, 1_000_000, 5_000_000],
+        value=1_000_000,
+        format_func=lambda n: f"{n:,}".replace(',', '.'),
+        key="m02_sc_rows"
+    )
+    
+    st.caption(
+        "O scorecard usa apenas buscas em tabelas e somas inteiras, o que permite implantá-lo em qualquer "
+        "sistema; predict_proba em NumPy faz um único produto matricial em ponto flutuante."
+    )
+    
+    if st.button("⚡ Medir Vazão", key="m02_btn_throughput"):
+        with st.spinner('🔄 Escorando operações...'):
+            scorecard_rate, proba_rate = measure_scoring_throughput(
+                model, scorecard, production_data, selected_features, n_rows
+            )
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Scorecard (operações/s)", f"{scorecard_rate:,.0f}".replace(',', '.'))
+        
+        with col2:
+            st.metric("predict_proba (operações/s)", f"{proba_rate:,.0f}".replace(',', '.'))
+        
+        with col3:
+            st.metric("Razão", f"{scorecard_rate / proba_rate:.1f}x")
+
+
+# =============================================================================
+# WEIGHT OF EVIDENCE (WoE) E INFORMATION VALUE (IV)
+# =============================================================================
+
+def woe_iv(bad, total):
+    """WoE por faixa e IV total a partir das contagens de inadimplentes e de operações por faixa"""
+    good = total - bad
+    
+    # Suavização de 0.5 evita log(0) em faixas sem bons ou sem maus pagadores
+    dist_good = (good + 0.5) / (good.sum() + 0.5 * len(good))
+    dist_bad = (bad + 0.5) / (bad.sum() + 0.5 * len(bad))
+    
+    woe = np.log(dist_good / dist_bad)
+    return woe, np.sum((dist_good - dist_bad) * woe)
+
+
+def pool_adjacent_violators(bad, total, increasing):
+    """Funde faixas adjacentes até a taxa de inadimplência ficar monotônica; retorna o índice final de cada faixa"""
+    merged = []
+    
+    for k in range(len(total)):
+        merged.append([bad[k], total[k], k])
+        
+        while len(merged) > 1:
+            prev_rate = merged[-2][0] / merged[-2][1]
+            last_rate = merged[-1][0] / merged[-1][1]
+            
+            if (prev_rate <= last_rate) == increasing or prev_rate == last_rate:
+                break
+            
+            last = merged.pop()
+            merged[-1] = [merged[-1][0] + last[0], merged[-1][1] + last[1], last[2]]
+    
+    return np.array([m[2] for m in merged])
+
+
+def monotonic_woe_binning(x, y, max_bins=20):
+    """
+    Binning ótimo monotônico de uma variável numérica.
+    Os dados são ordenados uma única vez; as contagens de cada faixa saem das somas
+    acumuladas nos limites, e faixas adjacentes são fundidas até a taxa de inadimplência
+    ficar monotônica (testando as duas direções e mantendo a de maior IV).
+    """
+    order = np.argsort(x, kind='mergesort')
+    x_sorted = x[order]
+    cum_bad = np.r_[0, np.cumsum(y[order])]
+    n = len(x_sorted)
+    
+    # Limites iniciais nos quantis, ajustados para posições onde o valor muda
+    changes = np.flatnonzero(x_sorted[1:] != x_sorted[:-1]) + 1
+    if len(changes):
+        targets = np.linspace(0, n, max_bins + 1)[1:-1]
+        candidates = changes[np.searchsorted(changes, targets).clip(max=len(changes) - 1)]
+        bounds = np.unique(np.r_[0, candidates, n])
+    else:
+        bounds = np.array([0, n])
+    
+    bad = np.diff(cum_bad[bounds])
+    total = np.diff(bounds)
+    
+    best = None
+    for increasing in [True, False]:
+        ends = pool_adjacent_violators(bad, total, increasing)
+        merged_bounds = np.r_[0, bounds[ends + 1]]
+        merged_bad = np.diff(cum_bad[merged_bounds])
+        merged_total = np.diff(merged_bounds)
+        woe, iv = woe_iv(merged_bad, merged_total)
+        
+        if best is None or iv > best['iv']:
+            best = {'bounds': merged_bounds, 'bad': merged_bad, 'total': merged_total, 'woe': woe, 'iv': iv}
+    
+    cuts = x_sorted[best['bounds'][1:-1]]
+    lower = np.r_[-np.inf, cuts]
+    upper = np.r_[cuts, np.inf]
+    labels = [f"[{lo:.4g}, {hi:.4g})" for lo, hi in zip(lower, upper)]
+    
+    return labels, best['bad'], best['total'], best['woe'], best['iv']
+
+
+def nominal_woe_binning(x, y):
+    """WoE de uma variável nominal codificada: cada código é uma faixa"""
+    codes, inverse = np.unique(x, return_inverse=True)
+    bad = np.bincount(inverse, weights=y).astype(np.int64)
+    total = np.bincount(inverse)
+    woe, iv = woe_iv(bad, total)
+    return [f"{code:g}" for code in codes], bad, total, woe, iv
+
+
+def compute_feature_woe(feature, x, y):
+    """WoE/IV de uma variável (executado em paralelo, uma variável por tarefa)"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.int64)
+    
+    if feature in NOMINAL_FEATURES:
+        labels, bad, total, woe, iv = nominal_woe_binning(x, y)
+    else:
+        labels, bad, total, woe, iv = monotonic_woe_binning(x, y)
+    
+    bins_df = pd.DataFrame({
+        'Faixa': labels,
+        'Operações': total,
+        'Inadimplentes': bad,
+        'Taxa de Inadimplência': bad / total,
+        'WoE': woe
+    })
+    
+    return feature, iv, bins_df
+
+
+def iv_strength(iv):
+    """Classificação usual do poder preditivo pelo Information Value"""
+    if iv < 0.02:
+        return 'Irrelevante'
+    elif iv < 0.1:
+        return 'Fraco'
+    elif iv < 0.3:
+        return 'Médio'
+    elif iv < 0.5:
+        return 'Forte'
+    return 'Suspeito (muito alto)'
+
+
+@st.cache_data(show_spinner=False)
+def compute_iv_table(data_hash, _data):
+    """
+    WoE/IV de todas as variáveis candidatas descritas em variable_descriptions,
+    processadas em paralelo. Cacheado pelo hash do conjunto de dados.
+    """
+    features = [
+        col for col in variable_descriptions
+        if col in _data.columns and col not in ['unnamed:0', 'id', 'loan_status']
+    ]
+    y = _data['loan_status'].to_numpy()
+    
+    results = Parallel(n_jobs=-1)(
+        delayed(compute_feature_woe)(feature, _data[feature].to_numpy(), y)
+        for feature in features
+    )
+    
+    iv_df = pd.DataFrame({
+        'Variável': [feature for feature, _, _ in results],
+        'IV': [iv for _, iv, _ in results],
+        'Nº Faixas': [len(bins_df) for _, _, bins_df in results]
+    })
+    iv_df['Poder Preditivo'] = iv_df['IV'].apply(iv_strength)
+    iv_df['Descrição'] = iv_df['Variável'].map(variable_descriptions)
+    iv_df = iv_df.sort_values('IV', ascending=False).reset_index(drop=True)
+    iv_df.index = iv_df.index + 1
+    
+    woe_tables = {feature: bins_df for feature, _, bins_df in results}
+    
+    return iv_df, woe_tables
+
+
+def display_iv_ranking(training_data):
+    """Função para exibir o ranking de variáveis por Information Value"""
+    st.markdown("### Ranking das Variáveis por Information Value (IV)")
+    
+    iv_df, woe_tables = compute_iv_table(dataset_fingerprint(training_data), training_data)
+    
+    st.dataframe(iv_df.round(4), use_container_width=True)
+    
+    feature = st.selectbox("Ver faixas de WoE da variável:", iv_df['Variável'], key="m02_woe_feature")
+    bins_df = woe_tables[feature]
+    
+    fig = go.Figure(go.Bar(
+        x=bins_df['Faixa'],
+        y=bins_df['WoE'],
+        marker_color=np.where(bins_df['WoE'] >= 0, 'green', 'red')
+    ))
+    fig.update_layout(
+        title=f'Weight of Evidence por Faixa - {feature}',
+        xaxis_title='Faixa',
+        yaxis_title='WoE',
+        height=350
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(bins_df.round(4), use_container_width=True)
+    
+    st.caption(
+        "WoE = ln(% bons / % maus) por faixa; IV = Σ (% bons - % maus) × WoE. "
+        "IV < 0.02: irrelevante; 0.02-0.1: fraco; 0.1-0.3: médio; 0.3-0.5: forte; > 0.5: suspeito."
+    )
+
+
+# =============================================================================
+# MONITORAMENTO DE ESTABILIDADE POPULACIONAL (PSI/CSI)
+# =============================================================================
+
+def drift_monitor_dir(model, selected_features, session_id):
+    """
+    Diretório do monitor de um modelo em uma sessão: cada modelo tem suas próprias faixas de
+    referência, e cada sessão do app acompanha (e reinicia) apenas os seus próprios lotes.
+    """
+    key = dataset_fingerprint(tuple(selected_features), model.coef_, model.intercept_)
+    return DRIFT_DIR / session_id / key
+
+
+def prune_drift_sessions(current_session, max_age_hours=DRIFT_SESSION_TTL_HOURS):
+    """
+    Remove as pastas de monitor de sessões sem atividade há mais de `max_age_hours` (última
+    gravação em qualquer arquivo da pasta), para que o cache não cresça sem limite.
+    """
+    if not DRIFT_DIR.exists():
+        return
+    
+    cutoff = time.time() - max_age_hours * 3600
+    
+    for session_dir in DRIFT_DIR.iterdir():
+        if session_dir.name == current_session or not session_dir.is_dir():
+            continue
+        try:
+            last_write = max((p.stat().st_mtime for p in session_dir.rglob('*')), default=session_dir.stat().st_mtime)
+        except OSError:
+            continue  # Removida por outra sessão durante a varredura
+        if last_write < cutoff:
+            shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def save_atomic(path, save, *args, **kwargs):
+    """Grava em um arquivo temporário e renomeia: leitores nunca veem um arquivo pela metade"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        save(f, *args, **kwargs)
+    tmp_path.replace(path)
+
+
+def bin_counts(cuts, columns):
+    """Histograma de cada variável nas faixas de referência, em uma única contagem (variáveis × faixas)"""
+    n_vars, n_bins = cuts.shape[0], cuts.shape[1] + 1
+    
+    flat_idx = np.concatenate([
+        j * n_bins + np.searchsorted(cuts[j], np.asarray(column, dtype=np.float64), side='right')
+        for j, column in enumerate(columns)
+    ])
+    
+    return np.bincount(flat_idx, minlength=n_vars * n_bins).reshape(n_vars, n_bins)
+
+
+def init_drift_monitor(monitor_dir, X_train, train_scores, n_bins=10):
+    """Fixa as faixas de referência (decis do treinamento) e o histograma de referência do monitor"""
+    if (monitor_dir / 'reference.npz').exists():
+        return
+    
+    columns = [X_train[col].to_numpy() for col in X_train.columns] + [train_scores]
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    cuts = np.array([np.quantile(np.asarray(col, dtype=np.float64), quantiles) for col in columns])
+    
+    monitor_dir.mkdir(parents=True, exist_ok=True)
+    save_atomic(monitor_dir / 'totals.npy', np.save, np.zeros((len(columns), n_bins), dtype=np.int64))
+    save_atomic(
+        monitor_dir / 'reference.npz', np.savez,
+        names=np.array(list(X_train.columns) + ['Score (PD)']),
+        cuts=cuts,
+        reference=bin_counts(cuts, columns)
+    )
+
+
+def update_drift_monitor(monitor_dir, X_batch, batch_scores):
+    """
+    Adiciona um lote de produção ao monitor: custo proporcional apenas às novas linhas.
+    O histograma do lote é salvo como um array compacto e somado ao acumulado.
+    """
+    reference = np.load(monitor_dir / 'reference.npz')
+    columns = [X_batch[col].to_numpy() for col in X_batch.columns] + [batch_scores]
+    counts = bin_counts(reference['cuts'], columns)
+    
+    # Identificador único e ordenável no tempo (a contagem de arquivos se repetiria após uma remoção)
+    batch_id = f"{time.time_ns():020d}_{uuid.uuid4().hex[:8]}"
+    save_atomic(monitor_dir / f'batch_{batch_id}.npy', np.save, counts.astype(np.int32))
+    
+    totals = np.load(monitor_dir / 'totals.npy') + counts
+    save_atomic(monitor_dir / 'totals.npy', np.save, totals)
+    
+    return counts
+
+
+def reset_drift_monitor(monitor_dir):
+    """Remove os lotes processados, mantendo a referência"""
+    for batch_file in monitor_dir.glob('batch_*.npy'):
+        batch_file.unlink()
+    
+    totals = np.load(monitor_dir / 'totals.npy')
+    save_atomic(monitor_dir / 'totals.npy', np.save, np.zeros_like(totals))
+
+
+def population_stability_index(expected_counts, actual_counts, eps=1e-4):
+    """PSI de cada linha (variável) entre histogramas esperados e observados"""
+    expected = np.clip(expected_counts / expected_counts.sum(axis=-1, keepdims=True), eps, None)
+    actual = np.clip(actual_counts / np.maximum(actual_counts.sum(axis=-1, keepdims=True), 1), eps, None)
+    return np.sum((actual - expected) * np.log(actual / expected), axis=-1)
+
+
+def psi_status(psi):
+    """Classificação usual de estabilidade pelo PSI"""
+    if psi < 0.1:
+        return '🟢 Estável'
+    elif psi < 0.25:
+        return '🟡 Atenção'
+    return '🔴 Drift'
+
+
+def display_drift_monitor(model, selected_features, X_train, production_data):
+    """Função para exibir o monitor de drift entre treinamento e produção"""
+    st.markdown("""
+    O monitor compara a distribuição de cada variável (**CSI**) e do score (**PSI**) nos dados de
+    produção com a do treinamento, usando faixas de referência fixas (decis do treinamento).
+    Cada novo lote de produção é apenas somado aos histogramas acumulados, sem reprocessar o histórico.
+    """)
+    
+    if 'm02_drift_session' not in st.session_state:
+        st.session_state['m02_drift_session'] = uuid.uuid4().hex
+        prune_drift_sessions(st.session_state['m02_drift_session'])
+    
+    monitor_dir = drift_monitor_dir(model, selected_features, st.session_state['m02_drift_session'])
+    init_drift_monitor(monitor_dir, X_train, model.predict_proba(X_train)[:, 1])
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    
+    with col1:
+        batch_size = st.slider("Tamanho do lote", min_value=500, max_value=10000, value=2000, step=500, key="m02_drift_batch")
+    
+    totals = np.load(monitor_dir / 'totals.npy')
+    rows_seen = int(totals[0].sum())
+    
+    with col2:
+        if st.button("➕ Processar Próximo Lote", key="m02_btn_drift_batch"):
+            if rows_seen >= len(production_data):
+                st.warning("⚠️ Todos os dados de produção já foram processados.")
+            else:
+                batch = production_data.iloc[rows_seen:rows_seen + batch_size]
+                update_drift_monitor(monitor_dir, batch[selected_features], model.predict_proba(batch[selected_features])[:, 1])
+    
+    with col3:
+        if st.button("🔄 Reiniciar Monitor", key="m02_btn_drift_reset"):
+            reset_drift_monitor(monitor_dir)
+    
+    reference = np.load(monitor_dir / 'reference.npz')
+    totals = np.load(monitor_dir / 'totals.npy')
+    batch_files = sorted(monitor_dir.glob('batch_*.npy'))
+    rows_seen = int(totals[0].sum())
+    
+    st.metric("Operações de Produção Monitoradas", f"{rows_seen} de {len(production_data)}")
+    
+    if not batch_files:
+        st.info("👆 Processe um lote de produção para iniciar o monitoramento.")
+        return
+    
+    names = list(reference['names'])
+    cumulative_psi = population_stability_index(reference['reference'], totals)
+    batch_psi = np.array([population_stability_index(reference['reference'], np.load(f)) for f in batch_files])
+    
+    drift_df = pd.DataFrame({
+        'Variável': names,
+        'Índice': ['PSI' if name == 'Score (PD)' else 'CSI' for name in names],
+        'Acumulado': cumulative_psi,
+        'Último Lote': batch_psi[-1],
+        'Status': [psi_status(v) for v in cumulative_psi]
+    }).sort_values('Acumulado', ascending=False)
+    
+    drifted = drift_df[drift_df['Acumulado'] >= 0.1]['Variável'].tolist()
+    if drifted:
+        st.warning(f"⚠️ Variáveis com drift: {', '.join(drifted)}")
+    else:
+        st.success("✅ Nenhuma variável com drift relevante (PSI/CSI < 0.1).")
+    
+    st.dataframe(drift_df.set_index('Variável').round(4), use_container_width=True)
+    
+    fig = go.Figure()
+    for j, name in enumerate(names):
+        fig.add_trace(go.Scatter(
+            x=np.arange(1, len(batch_files) + 1),
+            y=batch_psi[:, j],
+            mode='lines+markers',
+            name=name
+        ))
+    fig.add_hline(y=0.1, line_dash="dot", line_color="orange")
+    fig.add_hline(y=0.25, line_dash="dash", line_color="red")
+    fig.update_layout(
+        title='PSI/CSI por Lote de Produção',
+        xaxis_title='Lote',
+        yaxis_title='PSI / CSI',
+        height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    with st.expander("💡 Como interpretar"):
+        st.markdown("""
+        **PSI (Population Stability Index)**: Σ (% atual - % referência) × ln(% atual / % referência).
+        
+        **CSI (Characteristic Stability Index)**: o mesmo cálculo aplicado a cada variável do modelo.
+        
+        - PSI < 0.10: população estável
+        - 0.10 ≤ PSI < 0.25: mudança moderada, investigar
+        - PSI ≥ 0.25: mudança significativa, considerar recalibrar ou retreinar o modelo
+        """)
+
 
 # =============================================================================
-# FUNÇÕES AUXILIARES (fora do render para permitir caching)
+# CUT-OFF ÓTIMO PELO RESULTADO DA CARTEIRA
 # =============================================================================
 
-@st.cache_data
-def load_data():
-    try:
-        training_data = pd.read_csv('training_sample.csv')
-        production_data = pd.read_csv('testing_sample_true.csv')
-        return training_data, production_data
-    except FileNotFoundError:
-        st.error("Arquivos CSV não encontrados. Certifique-se de que 'training_sample.csv' e 'testing_sample_true.csv' estão no diretório correto.")
-        return None, None
+def loan_interest_income(data):
+    """Juros contratuais de cada operação ao longo do prazo (prestações menos principal financiado)"""
+    if {'installment', 'term'}.issubset(data.columns):
+        return data['installment'].to_numpy(np.float64) * data['term'].to_numpy(np.float64) - data['funded_amnt'].to_numpy(np.float64)
+    
+    return data['funded_amnt'].to_numpy(np.float64) * data['int_rate'].to_numpy(np.float64) / 100
+
+
+def profit_curve(pd_scores, ead, interest, lgd, defaults=None):
+    """
+    Resultado da carteira para todos os cut-offs em uma única ordenação O(n log n).
+    As operações são ordenadas pela PD; aprovar com cut-off t equivale a aprovar um prefixo
+    da ordenação, então o resultado de todos os cut-offs sai de uma soma acumulada.
+    Sem `defaults`, usa o resultado esperado: (1 - PD) × juros - PD × LGD × EAD.
+    Com `defaults`, usa o resultado realizado: juros dos bons - LGD × EAD dos inadimplentes.
+    """
+    order = np.argsort(pd_scores, kind='mergesort')
+    sorted_pd = np.asarray(pd_scores)[order]
+    ead = np.asarray(ead, dtype=np.float64)[order]
+    interest = np.asarray(interest, dtype=np.float64)[order]
+    
+    if defaults is None:
+        contribution = (1 - sorted_pd) * interest - sorted_pd * lgd * ead
+    else:
+        contribution = np.where(np.asarray(defaults)[order] == 1, -lgd * ead, interest)
+    
+    cumulative = np.cumsum(contribution)
+    
+    # Avalia apenas no fim de cada grupo de PDs empatadas
+    last = np.r_[np.flatnonzero(sorted_pd[1:] != sorted_pd[:-1]), len(sorted_pd) - 1]
+    
+    return pd.DataFrame({
+        'Cut-off': np.r_[0.0, sorted_pd[last]],
+        'Resultado': np.r_[0.0, cumulative[last]],
+        'Taxa de Aprovação': np.r_[0.0, (last + 1) / len(sorted_pd)]
+    })
+
+
+def display_profit_cutoff(results_df, cutoff, pd_scores=None):
+    """Função para exibir o otimizador de cut-off pelo resultado da carteira"""
+    st.subheader("💰 Cut-off Ótimo pelo Resultado da Carteira")
+    
+    st.markdown("""
+    Em vez de escolher o cut-off pela acurácia, o otimizador calcula para **cada** cut-off o resultado
+    da carteira aprovada: juros recebidos nas operações boas menos a perda (LGD × EAD) nas inadimplentes.
+    EAD é o valor financiado (`funded_amnt`) e os juros são as prestações contratuais menos o principal.
+    """)
+    
+    lgd = st.slider("LGD - Perda Dado o Default (%)", min_value=10, max_value=100, value=60, step=5, key="m02_lgd") / 100
+    
+    if pd_scores is None:
+        pd_scores = results_df['probabilidade_inadimplencia'].to_numpy()
+    ead = results_df['funded_amnt'].to_numpy()
+    interest = loan_interest_income(results_df)
+    
+    curves = {'Esperado (PD do modelo)': profit_curve(pd_scores, ead, interest, lgd)}
+    if 'loan_status' in results_df.columns:
+        curves['Realizado (loan_status)'] = profit_curve(pd_scores, ead, interest, lgd, results_df['loan_status'].to_numpy())
+    
+    cols = st.columns(len(curves))
+    fig = go.Figure()
+    
+    for col, (name, curve) in zip(cols, curves.items()):
+        best = curve.loc[curve['Resultado'].idxmax()]
+        current = curve.iloc[np.searchsorted(curve['Cut-off'].to_numpy(), cutoff, side='right') - 1]
+        
+        with col:
+            st.write(f"**{name}**")
+            st.metric("Cut-off Ótimo", f"{best['Cut-off']:.2%}", help=f"Aprova {best['Taxa de Aprovação']:.1%} das operações")
+            st.metric("Resultado Máximo (US$)", f"{best['Resultado']:,.0f}")
+            st.metric(
+                f"Resultado no Cut-off Atual ({cutoff:.0%})", f"{current['Resultado']:,.0f}",
+                delta=f"{current['Resultado'] - best['Resultado']:,.0f}"
+            )
+        
+        # Curva reduzida para o gráfico, preservando o ponto ótimo
+        step = max(1, len(curve) // 1000)
+        plot_idx = np.union1d(np.arange(0, len(curve), step), [curve['Resultado'].idxmax(), len(curve) - 1])
+        fig.add_trace(go.Scatter(
+            x=curve['Cut-off'].to_numpy()[plot_idx],
+            y=curve['Resultado'].to_numpy()[plot_idx],
+            mode='lines',
+            name=name
+        ))
+    
+    fig.add_vline(x=cutoff, line_dash="dash", line_color="red", annotation_text=f"Cut-off atual: {cutoff:.2%}")
+    fig.update_layout(
+        title='Resultado da Carteira Aprovada por Cut-off',
+        xaxis_title='Cut-off (PD máxima aprovada)',
+        yaxis_title='Resultado (US$)',
+        height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
+# =============================================================================
+# CALIBRAÇÃO DAS PROBABILIDADES
+# =============================================================================
+
+def reliability_diagnostics(y_true, y_proba, n_bins=10):
+    """
+    Curva de confiabilidade, Brier score e ECE em uma única passada de np.bincount:
+    cada observação é atribuída a uma faixa de probabilidade uma vez e as somas por faixa
+    (contagem, PD média, taxa observada, erro quadrático) saem de bincounts ponderados.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    
+    bins = np.minimum((y_proba * n_bins).astype(int), n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    sum_proba = np.bincount(bins, weights=y_proba, minlength=n_bins)
+    sum_true = np.bincount(bins, weights=y_true, minlength=n_bins)
+    sum_squared_error = np.bincount(bins, weights=(y_proba - y_true) ** 2, minlength=n_bins)
+    
+    n = counts.sum()
+    brier = sum_squared_error.sum() / n
+    ece = np.abs(sum_true - sum_proba).sum() / n
+    
+    nonempty = counts > 0
+    curve = pd.DataFrame({
+        'PD Média Prevista': sum_proba[nonempty] / counts[nonempty],
+        'Taxa de Inadimplência Observada': sum_true[nonempty] / counts[nonempty],
+        'Operações': counts[nonempty]
+    })
+    
+    return curve, brier, ece
+
+
+@st.cache_resource(show_spinner=False)
+def fit_calibrators(selected_features):
+    """
+    Ajusta as calibrações de Platt e isotônica em metade do conjunto de teste (fold de calibração);
+    a outra metade fica reservada para avaliação. Cacheado por conjunto de variáveis.
+    """
+    model, _, X_test, _, y_test = fit_logistic_model(selected_features)
+    
+    proba = model.predict_proba(X_test)[:, 1]
+    y = y_test.to_numpy()
+    
+    calibration_idx, evaluation_idx = train_test_split(
+        np.arange(len(y)), test_size=0.5, random_state=42, stratify=y
+    )
+    
+    # Platt: regressão logística sobre o logit da PD original
+    platt = LogisticRegression(C=1e6, max_iter=1000)
+    platt.fit(logit(np.clip(proba[calibration_idx], 1e-6, 1 - 1e-6)).reshape(-1, 1), y[calibration_idx])
+    
+    isotonic = IsotonicRegression(y_min=0, y_max=1, out_of_bounds='clip')
+    isotonic.fit(proba[calibration_idx], y[calibration_idx])
+    
+    return {'Platt': platt, 'Isotônica': isotonic}, proba[evaluation_idx], y[evaluation_idx]
+
+
+def apply_calibration(calibrators, method, proba):
+    """Aplica o método de calibração escolhido às PDs do modelo"""
+    if method == 'Platt':
+        return calibrators['Platt'].predict_proba(logit(np.clip(proba, 1e-6, 1 - 1e-6)).reshape(-1, 1))[:, 1]
+    elif method == 'Isotônica':
+        return calibrators['Isotônica'].predict(proba)
+    return proba
+
+
+def display_calibration(selected_features):
+    """Função para exibir a calibração das probabilidades; retorna o método escolhido"""
+    st.subheader("📏 Calibração das Probabilidades")
+    
+    st.markdown("""
+    Um modelo pode ordenar bem os riscos (boa AUC) e ainda assim errar o **nível** das probabilidades.
+    Perda esperada e precificação dependem de PDs calibradas, então o modelo pode ser recalibrado
+    com **Platt** (logística sobre o logit da PD) ou **regressão isotônica** (função monotônica livre),
+    ajustadas em metade do conjunto de teste e avaliadas na outra metade.
+    """)
+    
+    calibrators, proba_eval, y_eval = fit_calibrators(tuple(selected_features))
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=[0, 1], y=[0, 1], mode='lines', name='Calibração Perfeita',
+        line=dict(color='gray', dash='dash')
+    ))
+    
+    summary_rows = []
+    for method in ['Sem calibração', 'Platt', 'Isotônica']:
+        curve, brier, ece = reliability_diagnostics(y_eval, apply_calibration(calibrators, method, proba_eval))
+        summary_rows.append({'Método': method, 'Brier Score': brier, 'ECE': ece})
+        fig.add_trace(go.Scatter(
+            x=curve['PD Média Prevista'],
+            y=curve['Taxa de Inadimplência Observada'],
+            mode='lines+markers',
+            name=method
+        ))
+    
+    fig.update_layout(
+        title='Curva de Confiabilidade (metade de avaliação do teste)',
+        xaxis_title='PD Média Prevista',
+        yaxis_title='Taxa de Inadimplência Observada',
+        height=450
+    )
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        st.dataframe(pd.DataFrame(summary_rows).set_index('Método').round(4), use_container_width=True)
+        method = st.radio(
+            "PDs usadas na perda esperada:",
+            ['Sem calibração', 'Platt', 'Isotônica'],
+            key="m02_calibration_method",
+            help="Método aplicado às PDs de produção no cálculo do cut-off ótimo pelo resultado da carteira"
+        )
+    
+    with st.expander("💡 Brier Score e ECE"):
+        st.markdown("""
+        **Brier Score**: erro quadrático médio entre a PD prevista e o resultado observado (0 ou 1).
+        
+        **ECE (Expected Calibration Error)**: média, ponderada pelo número de operações, da diferença
+        entre a PD média prevista e a taxa observada em cada faixa de probabilidade.
+        
+        Em ambos, quanto menor, melhor.
+        """)
+    
+    return calibrators, method
+
+
+# =============================================================================
+# ESCORAGEM E REGISTRO DO MODELO (compartilhados com o serviço HTTP)
+# =============================================================================
+
+def score_applications(model, X, cutoff):
+    """PD e decisão (1 = NEGAR) de um lote de operações, em uma única chamada a predict_proba"""
+    proba = model.predict_proba(X)[:, 1]
+    return proba, (proba > cutoff).astype(int)
+
+
+def register_model(model, selected_features, cutoff, calibrators=None, calibration_method='Sem calibração',
+                   name='credit_model'):
+    """
+    Publica o modelo treinado no registro em disco (joblib), com as variáveis, o cut-off e a
+    calibração escolhida (a decisão continua sobre a PD do modelo, como na aba de produção).
+    A gravação é atômica: o serviço nunca carrega um arquivo pela metade.
+    """
+    MODEL_REGISTRY_DIR.mkdir(parents=True, exist_ok=True)
+    path = MODEL_REGISTRY_DIR / f"{name}.joblib"
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    
+    calibrator = None if calibration_method == 'Sem calibração' else (calibration_method, calibrators)
+    dump({
+        'model': model,
+        'features': list(selected_features),
+        'cutoff': float(cutoff),
+        'calibrator': calibrator,
+        'registered_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    }, tmp_path)
+    tmp_path.replace(path)
+    
+    return path
+
+
+def load_registered_model(name='credit_model'):
+    """Carrega o modelo publicado no registro (FileNotFoundError se nenhum foi registrado)"""
+    return load(MODEL_REGISTRY_DIR / f"{name}.joblib")
+
+
+# =============================================================================
+# GRÁFICOS E TABELAS (agregados no servidor antes de ir para o navegador)
+# =============================================================================
+
+def binned_histogram(values, bins=50, value_range=None, weights=None):
+    """Histograma pré-agregado com np.histogram: o gráfico recebe só as contagens (ou pesos somados), não os pontos"""
+    counts, edges = np.histogram(np.asarray(values), bins=bins, range=value_range, weights=weights)
+    return (edges[:-1] + edges[1:]) / 2, counts, edges[1] - edges[0]
+
+
+def histogram_bar(values, bins=50, value_range=None, **bar_kwargs):
+    """Barra do Plotly equivalente a um go.Histogram, mas com tamanho fixo independente de n"""
+    centers, counts, width = binned_histogram(values, bins, value_range)
+    return go.Bar(x=centers, y=counts, width=width, **bar_kwargs)
+
+
+def display_paginated_table(df, key, page_sizes=(25, 50, 100, 500)):
+    """Exibe uma tabela paginada no servidor: apenas a página atual é enviada ao navegador"""
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        page_size = st.selectbox("Linhas por página", page_sizes, index=1, key=f"{key}_page_size")
+    
+    n_pages = max(1, int(np.ceil(len(df) / page_size)))
+    
+    with col2:
+        page = st.number_input(f"Página (de {n_pages})", min_value=1, max_value=n_pages, value=1, key=f"{key}_page")
+    
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size], use_container_width=True)
+    st.caption(f"Exibindo linhas {start + 1} a {min(start + page_size, len(df))} de {len(df)}")
+
+
+# =============================================================================
+# DISTRIBUIÇÃO DE PERDAS DA CARTEIRA (VASICEK / CÓPULA GAUSSIANA DE UM FATOR)
+# =============================================================================
+
+def pd_buckets(pd_scores, ead, n_buckets=256):
+    """
+    Agrupa as operações em faixas de PD de mesmo tamanho. Cada faixa guarda a soma de EAD,
+    a soma de EAD² e a PD média ponderada por EAD (o que preserva exatamente a perda esperada).
+    """
+    pd_scores = np.asarray(pd_scores, dtype=np.float64)
+    ead = np.asarray(ead, dtype=np.float64)
+    n = len(pd_scores)
+    n_buckets = min(n_buckets, n)
+    
+    bucket = np.empty(n, dtype=np.int64)
+    bucket[np.argsort(pd_scores, kind='mergesort')] = np.arange(n) * n_buckets // n
+    
+    exposure = np.bincount(bucket, weights=ead, minlength=n_buckets)
+    exposure_squared = np.bincount(bucket, weights=ead ** 2, minlength=n_buckets)
+    bucket_pd = np.bincount(bucket, weights=ead * pd_scores, minlength=n_buckets) / exposure
+    
+    return exposure, exposure_squared, bucket_pd
+
+
+@st.cache_data(show_spinner=False)
+def simulate_vasicek_losses(pd_scores, ead, lgd, rho, n_scenarios=100_000, importance_shift=0.0,
+                            chunk_size=10_000, seed=42):
+    """
+    Simula a distribuição de perdas da carteira com cópula gaussiana de um fator.
+    Dado o fator sistêmico Z, a PD condicional é Φ((Φ⁻¹(PD) + √ρ·Z) / √(1-ρ)); a perda condicional
+    tem média Σ LGD·EAD·p(Z) e o risco idiossincrático entra por aproximação normal com variância
+    Σ (LGD·EAD)²·p(Z)(1-p(Z)). Os cenários são processados em blocos (memória limitada).
+    Com `importance_shift` > 0, Z é sorteado de N(shift, 1) e cada cenário recebe o peso
+    da razão de verossimilhança, concentrando cenários na cauda.
+    
+    Retorna (perdas, pesos) por cenário.
+    """
+    exposure, exposure_squared, bucket_pd = pd_buckets(pd_scores, ead)
+    threshold = ndtri(np.clip(bucket_pd, 1e-10, 1 - 1e-10))
+    
+    rng = np.random.default_rng(seed)
+    losses = np.empty(n_scenarios)
+    weights = np.empty(n_scenarios)
+    
+    for start in range(0, n_scenarios, chunk_size):
+        size = min(chunk_size, n_scenarios - start)
+        
+        z = rng.standard_normal(size) + importance_shift
+        conditional_pd = ndtr((threshold[None, :] + np.sqrt(rho) * z[:, None]) / np.sqrt(1 - rho))
+        
+        mean_loss = lgd * (conditional_pd @ exposure)
+        var_loss = lgd ** 2 * ((conditional_pd * (1 - conditional_pd)) @ exposure_squared)
+        
+        losses[start:start + size] = np.maximum(mean_loss + np.sqrt(var_loss) * rng.standard_normal(size), 0)
+        weights[start:start + size] = np.exp(-importance_shift * z + importance_shift ** 2 / 2)
+    
+    return losses, weights / weights.sum()
+
+
+def loss_risk_measures(losses, weights, levels=(0.99, 0.999)):
+    """EL, VaR e Expected Shortfall (ponderados pelos pesos dos cenários)"""
+    order = np.argsort(losses)
+    sorted_losses = losses[order]
+    cumulative_weights = np.cumsum(weights[order])
+    
+    measures = {'EL': np.sum(weights * losses)}
+    
+    for level in levels:
+        idx = min(np.searchsorted(cumulative_weights, level), len(sorted_losses) - 1)
+        var = sorted_losses[idx]
+        tail = sorted_losses >= var
+        measures[f'VaR {level:.1%}'] = var
+        measures[f'ES {level:.1%}'] = np.sum(weights[order][tail] * sorted_losses[tail]) / np.sum(weights[order][tail])
+    
+    return measures
+
+
+def vasicek_asymptotic_var(pd_scores, ead, lgd, rho, level):
+    """VaR do modelo ASRF (carteira infinitamente granular, base da fórmula de Basileia)"""
+    pd_scores = np.clip(np.asarray(pd_scores, dtype=np.float64), 1e-10, 1 - 1e-10)
+    conditional_pd = ndtr((ndtri(pd_scores) + np.sqrt(rho) * ndtri(level)) / np.sqrt(1 - rho))
+    return lgd * np.sum(np.asarray(ead, dtype=np.float64) * conditional_pd)
+
+
+def display_portfolio_loss(pd_production, production_data):
+    """Função para exibir o simulador da distribuição de perdas da carteira"""
+    st.markdown("""
+    As PDs do modelo na carteira de produção e o valor de cada operação (`loan_amnt`, usado como EAD)
+    alimentam uma simulação de **cópula gaussiana de um fator** (modelo de Vasicek, base do capital
+    de Basileia): um fator sistêmico comum move as PDs de todas as operações ao mesmo tempo,
+    gerando a cauda da distribuição de perdas.
+    """)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        rho = st.slider("Correlação de Ativos (ρ)", min_value=0.01, max_value=0.5, value=0.15, step=0.01, key="m02_vasicek_rho")
+    
+    with col2:
+        lgd = st.slider("LGD (%)", min_value=10, max_value=100, value=60, step=5, key="m02_vasicek_lgd") / 100
+    
+    with col3:
+        n_scenarios = st.select_slider(
+            "Cenários", options=[100_000, 250_000, 500_000, 1_000_000], value=100_000, key="m02_vasicek_scenarios"
+        )
+    
+    with col4:
+        use_importance = st.checkbox("Importance sampling", value=True, key="m02_vasicek_is",
+                                     help="Desloca o fator sistêmico para a cauda e corrige pelos pesos")
+    
+    ead = production_data['loan_amnt'].to_numpy()
+    
+    with st.spinner('🔄 Simulando cenários...'):
+        start = time.perf_counter()
+        losses, weights = simulate_vasicek_losses(
+            np.asarray(pd_production), ead, lgd, rho, n_scenarios, 2.0 if use_importance else 0.0
+        )
+        elapsed = time.perf_counter() - start
+    
+    measures = loss_risk_measures(losses, weights)
+    total_ead = ead.sum()
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    for col, (name, value) in zip([col1, col2, col3, col4, col5], measures.items()):
+        with col:
+            st.metric(name, f"{value / 1e6:,.2f} mi", help=f"{value / total_ead:.2%} da exposição total")
+    
+    st.caption(
+        f"{n_scenarios:,} cenários em {elapsed:.2f}s · Exposição total: US$ {total_ead / 1e6:,.1f} mi · "
+        f"VaR 99,9% assintótico (ASRF): {vasicek_asymptotic_var(pd_production, ead, lgd, rho, 0.999) / 1e6:,.2f} mi"
+    )
+    
+    # Pesos de importância somados por faixa: a altura de cada barra é a probabilidade da faixa
+    centers, probability, width = binned_histogram(losses / 1e6, bins=80, weights=weights)
+    
+    fig = go.Figure(go.Bar(x=centers, y=probability, width=width, marker_color='steelblue', name='Probabilidade'))
+    for name, color in [('EL', 'green'), ('VaR 99.0%', 'orange'), ('VaR 99.9%', 'red')]:
+        fig.add_vline(x=measures[name] / 1e6, line_dash="dash", line_color=color, annotation_text=name)
+    fig.update_layout(
+        title='Distribuição de Perdas da Carteira',
+        xaxis_title='Perda (US$ milhões)',
+        yaxis_title='Probabilidade',
+        height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    with st.expander("💡 Como interpretar"):
+        st.markdown("""
+        **EL (Perda Esperada)**: média da distribuição, coberta pela precificação e pelas provisões.
+        
+        **VaR (Value at Risk)**: perda que só é superada com probabilidade de 1% (99%) ou 0,1% (99,9%).
+        
+        **ES (Expected Shortfall)**: perda média nos cenários além do VaR.
+        
+        **Capital econômico**: VaR 99,9% - EL, a perda inesperada que o capital precisa absorver.
+        
+        **Correlação (ρ)**: quanto maior, mais as inadimplências acontecem juntas e mais pesada a cauda.
+        """)
+
+
+# =============================================================================
+# EXPLICAÇÕES POR OPERAÇÃO
+# =============================================================================
+
+@st.cache_resource(show_spinner=False)
+def compute_loan_explanations(selected_features, top_k=3):
+    """
+    Contribuição de cada variável ao logit de cada operação de produção, calculada de uma vez:
+    coeficiente × desvio padrão × valor padronizado (= coeficiente × desvio em relação à média
+    do treinamento). Os top-k fatores que mais aumentam o risco saem de np.argpartition, e um
+    índice por `id` permite consultar qualquer operação sem varrer a tabela. Cacheado por modelo.
+    """
+    model, X_train, _, _, _ = fit_logistic_model(selected_features)
+    _, production_data = load_data()
+    
+    mean = X_train.mean().to_numpy(dtype=np.float64)
+    std = X_train.std().to_numpy(dtype=np.float64)
+    std = np.where(std > 0, std, 1)
+    
+    standardized = (production_data[list(selected_features)].to_numpy(dtype=np.float64) - mean) / std
+    contributions = (standardized * (model.coef_[0] * std)).astype(np.float32)
+    
+    # Top-k por operação: argpartition (O(p)) e ordenação só dos k selecionados
+    k = min(top_k, len(selected_features))
+    top_idx = np.argpartition(-contributions, k - 1, axis=1)[:, :k]
+    top_values = np.take_along_axis(contributions, top_idx, axis=1)
+    top_idx = np.take_along_axis(top_idx, np.argsort(-top_values, axis=1), axis=1)
+    
+    id_index = pd.Index(production_data['id'].to_numpy())
+    
+    return contributions, top_idx, id_index
+
+
+def display_loan_explanations(selected_features, y_pred_proba_production, y_pred_production):
+    """Função para exibir as explicações por operação"""
+    st.subheader("🔍 Por que esta operação foi negada?")
+    
+    contributions, top_idx, id_index = compute_loan_explanations(tuple(selected_features))
+    features = np.array(selected_features)
+    
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        loan_id = st.number_input("ID da operação:", min_value=0, value=int(id_index[0]), step=1, key="m02_explain_id")
+    
+    position = id_index.get_indexer([loan_id])[0]
+    
+    if position < 0:
+        st.warning(f"⚠️ Operação {loan_id} não encontrada nos dados de produção.")
+    else:
+        decision = 'NEGAR' if y_pred_production[position] == 1 else 'APROVAR'
+        
+        with col2:
+            st.metric(
+                f"Decisão: {decision}",
+                f"PD = {y_pred_proba_production[position]:.2%}",
+                help="Contribuições medidas em log-odds em relação à operação média do treinamento"
+            )
+        
+        loan_contributions = contributions[position]
+        order = np.argsort(loan_contributions)
+        
+        fig = go.Figure(go.Bar(
+            x=loan_contributions[order],
+            y=features[order],
+            orientation='h',
+            marker_color=np.where(loan_contributions[order] > 0, 'red', 'green')
+        ))
+        fig.update_layout(
+            title=f'Contribuição de Cada Variável ao Risco da Operação {loan_id}',
+            xaxis_title='Contribuição ao logit (vermelho aumenta o risco, verde reduz)',
+            height=300
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        drivers = [features[j] for j in top_idx[position] if loan_contributions[j] > 0]
+        if drivers:
+            st.write(f"**Principais fatores de risco:** {', '.join(drivers)}")
+        else:
+            st.write("**Nenhuma variável aumenta o risco desta operação em relação à operação média.**")
+    
+    # Visão agregada: principal fator de risco das operações negadas
+    denied = y_pred_production == 1
+    if denied.any():
+        main_driver_counts = np.bincount(top_idx[denied, 0], minlength=len(features))
+        
+        fig = go.Figure(go.Bar(x=features, y=main_driver_counts, marker_color='indianred'))
+        fig.update_layout(
+            title='Principal Fator de Risco das Operações Negadas',
+            xaxis_title='Variável',
+            yaxis_title='Operações Negadas',
+            height=350
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# =============================================================================
+# DESEMPENHO POR SEGMENTO
+# =============================================================================
+
+def segment_metrics(segments, y_true, pd_scores, approved):
+    """
+    Métricas por segmento em uma única ordenação por (segmento, PD): contagens, taxas e a AUC
+    de cada segmento pela soma de postos (Mann-Whitney), todas obtidas com np.add.reduceat
+    sobre os blocos contíguos de cada segmento, sem uma chamada ao sklearn por segmento.
+    """
+    segments = np.asarray(segments)
+    pd_scores = np.asarray(pd_scores, dtype=np.float64)
+    
+    order = np.lexsort((pd_scores, segments))
+    seg = segments[order]
+    scores = pd_scores[order]
+    y = np.asarray(y_true, dtype=np.float64)[order]
+    approved = np.asarray(approved, dtype=np.float64)[order]
+    n = len(seg)
+    
+    seg_starts = np.flatnonzero(np.r_[True, seg[1:] != seg[:-1]])
+    seg_sizes = np.diff(np.r_[seg_starts, n])
+    
+    # Posto dentro do segmento, com postos médios para PDs empatadas no mesmo segmento
+    rank = np.arange(1, n + 1) - np.repeat(seg_starts, seg_sizes)
+    tie_starts = np.flatnonzero(np.r_[True, (seg[1:] != seg[:-1]) | (scores[1:] != scores[:-1])])
+    tie_sizes = np.diff(np.r_[tie_starts, n])
+    mid_rank = np.repeat(np.add.reduceat(rank, tie_starts) / tie_sizes, tie_sizes)
+    
+    n_pos = np.add.reduceat(y, seg_starts)
+    n_neg = seg_sizes - n_pos
+    rank_sum_pos = np.add.reduceat(mid_rank * y, seg_starts)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        segment_auc = (rank_sum_pos - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+    
+    return pd.DataFrame({
+        'Operações': seg_sizes,
+        'Taxa de Aprovação': np.add.reduceat(approved, seg_starts) / seg_sizes,
+        'Taxa de Inadimplência': n_pos / seg_sizes,
+        'PD Média': np.add.reduceat(scores, seg_starts) / seg_sizes,
+        'AUC': segment_auc
+    }, index=pd.Index(seg[seg_starts], name='Segmento'))
+
+
+def display_segment_metrics(production_data, y_pred_proba_production, y_pred_production):
+    """Função para exibir o desempenho do modelo por segmento"""
+    st.subheader("🗺️ Desempenho por Segmento")
+    
+    segment_feature = st.selectbox(
+        "Segmentar por:", [f for f in SEGMENT_FEATURES if f in production_data.columns], key="m02_segment_feature"
+    )
+    
+    metrics_df = segment_metrics(
+        production_data[segment_feature].to_numpy(),
+        production_data['loan_status'].to_numpy(),
+        y_pred_proba_production,
+        y_pred_production == 0
+    )
+    
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=['Taxa de Inadimplência Observada vs PD Média', 'AUC por Segmento']
+    )
+    
+    x_labels = metrics_df.index.astype(str)
+    fig.add_trace(go.Bar(x=x_labels, y=metrics_df['Taxa de Inadimplência'], name='Inadimplência Observada', marker_color='indianred'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=x_labels, y=metrics_df['PD Média'], mode='markers', name='PD Média', marker=dict(color='black', size=8)), row=1, col=1)
+    fig.add_trace(go.Bar(x=x_labels, y=metrics_df['AUC'], name='AUC', marker_color='steelblue', showlegend=False), row=1, col=2)
+    fig.add_hline(y=0.5, line_dash="dash", line_color="red", row=1, col=2)
+    
+    fig.update_xaxes(title_text=f"{segment_feature} (código)", type='category')
+    fig.update_layout(height=450)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.dataframe(metrics_df.round(4), use_container_width=True)
+    st.caption("AUC indisponível (vazia) em segmentos com apenas bons ou apenas maus pagadores.")
 
 
 def plot_sigmoid_curve(model, X_train, y_train, selected_features):
@@ -128,11 +2510,12 @@ def plot_sigmoid_curve(model, X_train, y_train, selected_features):
     prob_class_1 = y_pred_proba[y_train == 1]
     
     fig.add_trace(
-        go.Histogram(
-            x=prob_class_0,
+        histogram_bar(
+            prob_class_0,
+            bins=30,
+            value_range=(0, 1),
             name='Bons Pagadores (Classe 0)',
             opacity=0.7,
-            nbinsx=30,
             marker_color='green',
             showlegend=True
         ),
@@ -140,11 +2523,12 @@ def plot_sigmoid_curve(model, X_train, y_train, selected_features):
     )
     
     fig.add_trace(
-        go.Histogram(
-            x=prob_class_1,
+        histogram_bar(
+            prob_class_1,
+            bins=30,
+            value_range=(0, 1),
             name='Inadimplentes (Classe 1)',
             opacity=0.7,
-            nbinsx=30,
             marker_color='red',
             showlegend=True
         ),
@@ -165,10 +2549,53 @@ def plot_sigmoid_curve(model, X_train, y_train, selected_features):
     return fig
 
 
+def decimate_monotone_curve(x, y, tolerance):
+    """
+    Reduz uma curva monotônica (como a ROC) mantendo apenas os vértices necessários para
+    desenhá-la com erro menor que `tolerance` (≈ 1 pixel): em cada célula da grade de
+    tolerância ficam só o ponto de entrada e o de saída da curva. O número de pontos
+    resultante é limitado por ~4 / tolerance, independentemente de n.
+    """
+    cells = np.floor(x / tolerance) * (1 / tolerance + 1) + np.floor(y / tolerance)
+    new_cell = np.r_[True, cells[1:] != cells[:-1]]
+    last_in_cell = np.r_[new_cell[1:], True]
+    keep = new_cell | last_in_cell
+    return x[keep], y[keep]
+
+
+@st.cache_data(show_spinner=False)
+def compute_roc(y_true, y_score, tolerance=1 / 500):
+    """
+    Curva ROC e AUC exata em uma única ordenação dos scores. A AUC usa todos os vértices
+    (regra do trapézio, equivalente ao tratamento de empates por postos médios); a curva
+    devolvida é reduzida aos vértices visíveis. Cacheada para reaproveitar entre gráfico e métrica.
+    """
+    y_true = np.asarray(y_true)
+    y_score = np.asarray(y_score)
+    
+    order = np.argsort(-y_score, kind='mergesort')
+    sorted_scores = y_score[order]
+    
+    # Último índice de cada grupo de scores empatados
+    last = np.r_[np.flatnonzero(sorted_scores[1:] != sorted_scores[:-1]), len(sorted_scores) - 1]
+    tps = np.cumsum(y_true[order] == 1)[last]
+    fps = last + 1 - tps
+    
+    tpr = np.r_[0, tps / tps[-1]]
+    fpr = np.r_[0, fps / fps[-1]]
+    roc_auc = np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2)
+    
+    # Descarta pontos colineares (meio de trechos horizontais ou verticais) antes de reduzir
+    corners = np.r_[True, np.logical_or(np.diff(fpr, 2), np.diff(tpr, 2)), True]
+    fpr, tpr = fpr[corners], tpr[corners]
+    
+    fpr_plot, tpr_plot = decimate_monotone_curve(fpr, tpr, tolerance)
+    return fpr_plot, tpr_plot, roc_auc
+
+
 def plot_roc_curve(y_true, y_pred_proba):
     """Função para plotar curva ROC"""
-    fpr, tpr, _ = roc_curve(y_true, y_pred_proba)
-    roc_auc = auc(fpr, tpr)
+    fpr, tpr, roc_auc = compute_roc(y_true, y_pred_proba)
     
     fig = go.Figure()
     
@@ -321,7 +2748,7 @@ def display_model_statistics(model, X_train, y_train, X_test, y_test, cutoff=0.5
         """)
 
 
-def display_regression_equation(model, selected_features):
+def display_regression_equation(model, selected_features, inference=None):
     """Função para exibir equação da regressão"""
     st.subheader("🔢 Equação da Regressão Logística")
     
@@ -336,6 +2763,46 @@ def display_regression_equation(model, selected_features):
     
     st.dataframe(coef_df.round(4))
     
+    if inference is not None:
+        inference_df, converged = inference
+        
+        st.markdown("### Inferência dos Coeficientes:")
+        st.caption(
+            "Coeficientes reestimados por máxima verossimilhança sem penalização; erros padrão, z, "
+            "p-valores e intervalos são avaliados nessa estimativa, não nos coeficientes regularizados acima."
+        )
+        if not converged:
+            st.warning(
+                "⚠️ O ajuste de máxima verossimilhança não convergiu (possível separação ou colinearidade "
+                "extrema): erros padrão e p-valores não são confiáveis."
+            )
+        st.dataframe(
+            inference_df.style.format({
+                'Coeficiente (MV)': '{:.4f}',
+                'Erro Padrão': '{:.4f}',
+                'Estatística z': '{:.2f}',
+                'p-valor': '{:.4g}',
+                'IC 95% Inferior': '{:.4f}',
+                'IC 95% Superior': '{:.4f}',
+                'VIF': '{:.2f}'
+            }, na_rep='-'),
+            use_container_width=True
+        )
+        
+        with st.expander("💡 Erros Padrão, p-valores e VIF"):
+            st.markdown("""
+            **Erro Padrão (Wald)**: obtido da inversa da matriz de informação de Fisher X'WX,
+            onde W contém p(1-p) de cada observação, avaliada na estimativa de máxima verossimilhança.
+            
+            **p-valor**: probabilidade de observar uma estatística z tão extrema se o coeficiente
+            verdadeiro fosse zero. Valores abaixo de 5% indicam coeficiente estatisticamente significante.
+            
+            **VIF (Fator de Inflação da Variância)**: mede a multicolinearidade.
+            - VIF < 5: colinearidade baixa
+            - VIF entre 5 e 10: colinearidade moderada
+            - VIF > 10: colinearidade alta (ex.: loan_amnt e funded_amnt), coeficientes instáveis
+            """)
+    
     st.markdown("### Equação Logística:")
     equation = f"logit(p) = {intercept:.4f}"
     
@@ -423,6 +2890,12 @@ def render():
     if training_data is None or production_data is None:
         st.stop()
     
+    if using_synthetic_training():
+        st.info(
+            "ℹ️ Treinamento com a carteira sintética (training_sample.csv ausente). O gerador foi ajustado "
+            "em metade do testing_sample_true.csv; a produção usa apenas a outra metade, que ele não viu."
+        )
+    
     # Seção de configuração do modelo na página principal
     st.header("🔧 Configuração do Modelo")
     
@@ -434,13 +2907,20 @@ def render():
     selected_features = st.multiselect(
         "Selecione as variáveis para o modelo:",
         available_features,
-        default=['loan_amnt', 'int_rate', 'log_annual_inc', 'fico_score', 'funded_amnt'],
+        default=DEFAULT_FEATURES,
         help="Selecione as variáveis que serão utilizadas no modelo de regressão logística",
         key="m02_selected_features"
     )
     
+    # Busca automática de subconjuntos de variáveis
+    with st.expander("🔎 Busca Automática de Variáveis"):
+        display_feature_search(training_data, available_features)
+    
     # Exibir descrições das variáveis em um expander
     with st.expander("📝 Ver Descrição das Variáveis"):
+        display_iv_ranking(training_data)
+        
+        st.markdown("---")
         st.markdown("### Descrição de Todas as Variáveis Disponíveis")
         for feature in available_features:
             st.write(f"**{feature}**: {variable_descriptions.get(feature, 'Descrição não disponível')}")
@@ -495,24 +2975,17 @@ def render():
     # Botão para executar o modelo
     run_model = st.button("🚀 Executar Modelo de Regressão Logística", type="primary", key="m02_btn_run")
     
-    if not run_model:
+    if run_model:
+        st.session_state['m02_trained_features'] = tuple(selected_features)
+    
+    # O modelo continua disponível entre interações enquanto as variáveis não mudarem
+    if st.session_state.get('m02_trained_features') != tuple(selected_features):
         st.info("👆 Clique no botão acima para treinar o modelo com as variáveis selecionadas.")
         return
     
     # Mostrar progresso
     with st.spinner('🔄 Treinando modelo de regressão logística...'):
-        # Preparar dados
-        X = training_data[selected_features]
-        y = training_data['loan_status']
-        
-        # Dividir dados em treino e teste
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.3, random_state=42, stratify=y
-        )
-        
-        # Criar e treinar modelo
-        model = LogisticRegression(random_state=42, max_iter=1000)
-        model.fit(X_train, y_train)
+        model, X_train, X_test, y_train, y_test = fit_logistic_model(tuple(selected_features))
     
     st.success("✅ Modelo treinado com sucesso!")
     st.info(f"🎯 Cut-off aplicado: {cutoff:.2%} - Todas as análises usarão este ponto de corte.")
@@ -520,10 +2993,16 @@ def render():
     st.markdown("---")
     
     # Tabs para organizar o conteúdo
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    tab1, tab2, tab3, tab_validation, tab_regularization, tab_benchmark, tab_scorecard, tab_drift, tab_loss, tab4, tab5 = st.tabs([
         "📊 Análise do Modelo", 
         "🎯 Aplicação em Produção", 
         "📈 Comparação com Produção",
+        "🧪 Validação",
+        "📉 Regularização",
+        "🏁 Benchmark",
+        "🧾 Scorecard",
+        "📡 Monitoramento",
+        "🎲 Perda da Carteira",
         "📋 Dados", 
         "ℹ️ Informações"
     ])
@@ -570,20 +3049,23 @@ def render():
         display_model_statistics(model, X_train, y_train, X_test, y_test, cutoff)
         
         # Equação da regressão
-        display_regression_equation(model, selected_features)
+        display_regression_equation(model, selected_features, compute_coefficient_inference(tuple(selected_features)))
+        
+        # Calibração das probabilidades
+        calibrators, calibration_method = display_calibration(selected_features)
     
     with tab2:
         st.header("🎯 Aplicação do Modelo em Produção")
         
         # Aplicar modelo nos dados de produção
-        X_production = production_data[selected_features]
-        y_pred_proba_production = model.predict_proba(X_production)[:, 1]
-        y_pred_production = apply_custom_cutoff(y_pred_proba_production, cutoff)
+        y_pred_proba_production, y_pred_production = score_applications(
+            model, production_data[selected_features], cutoff
+        )
         
         # Criar DataFrame com resultados
         results_df = production_data.copy()
         results_df['probabilidade_inadimplencia'] = y_pred_proba_production
-        results_df['decisao_credito'] = ['NEGAR' if pred == 1 else 'APROVAR' for pred in y_pred_production]
+        results_df['decisao_credito'] = np.where(y_pred_production == 1, 'NEGAR', 'APROVAR')
         
         # Estatísticas de decisão
         st.subheader("📊 Estatísticas de Decisão")
@@ -605,13 +3087,23 @@ def render():
         with col4:
             st.metric("Cut-off Aplicado", f"{cutoff:.2%}")
         
+        # Publicação do modelo para a escoragem fora do Streamlit
+        if st.button("📦 Registrar Modelo para o Serviço de Escoragem", key="m02_btn_register"):
+            path = register_model(model, selected_features, cutoff, calibrators, calibration_method)
+            st.success(
+                f"Modelo registrado em `{path}`. Inicie o serviço HTTP com "
+                "`python credit_scoring_service.py serve` e meça a vazão com "
+                "`python credit_scoring_service.py load`."
+            )
+        
         # Distribuição de probabilidades com linha de cut-off
         st.subheader("📈 Distribuição de Probabilidades de Inadimplência")
         
         fig = go.Figure()
-        fig.add_trace(go.Histogram(
-            x=y_pred_proba_production,
-            nbinsx=50,
+        fig.add_trace(histogram_bar(
+            y_pred_proba_production,
+            bins=50,
+            value_range=(0, 1),
             name='Distribuição de Probabilidades',
             opacity=0.7,
             marker_color='lightblue'
@@ -675,7 +3167,18 @@ def render():
         # Exibir resultados
         st.subheader("📋 Resultados das Decisões")
         display_cols = ['id', 'probabilidade_inadimplencia', 'decisao_credito', 'faixa_probabilidade']
-        st.dataframe(results_df[display_cols].round(4))
+        display_paginated_table(results_df[display_cols].round(4), key="m02_decisions")
+        
+        # Explicações por operação
+        display_loan_explanations(selected_features, y_pred_proba_production, y_pred_production)
+        
+        # Cut-off ótimo pelo resultado da carteira (com as PDs calibradas, se escolhido)
+        if calibration_method != 'Sem calibração':
+            st.caption(f"PDs calibradas pelo método: {calibration_method}")
+        display_profit_cutoff(
+            results_df, cutoff,
+            apply_calibration(calibrators, calibration_method, y_pred_proba_production)
+        )
     
     with tab3:
         st.header("📈 Comparação com Dados de Produção")
@@ -683,9 +3186,9 @@ def render():
         if 'loan_status' in production_data.columns:
             y_true_production = production_data['loan_status']
             
-            X_production = production_data[selected_features]
-            y_pred_proba_production = model.predict_proba(X_production)[:, 1]
-            y_pred_production = apply_custom_cutoff(y_pred_proba_production, cutoff)
+            y_pred_proba_production, y_pred_production = score_applications(
+                model, production_data[selected_features], cutoff
+            )
             
             st.subheader("🔄 Comparação de Performance por Cut-off")
             
@@ -746,7 +3249,7 @@ def render():
                 st.metric("Acurácia em Produção", f"{accuracy_prod:.4f}")
             
             with col2:
-                roc_auc_prod = auc(*roc_curve(y_true_production, y_pred_proba_production)[:2])
+                roc_auc_prod = compute_roc(y_true_production, y_pred_proba_production)[2]
                 st.metric("AUC em Produção", f"{roc_auc_prod:.4f}")
             
             with col3:
@@ -761,9 +3264,40 @@ def render():
             roc_prod_fig, _ = plot_roc_curve(y_true_production, y_pred_proba_production)
             st.plotly_chart(roc_prod_fig, use_container_width=True)
             
+            # Desempenho por segmento
+            display_segment_metrics(production_data, y_pred_proba_production, y_pred_production)
+            
         else:
             st.info("⚠️ Os dados de produção não contêm a variável 'loan_status' para comparação.")
     
+    with tab_validation:
+        st.header("🧪 Validação do Modelo")
+        y_pred_proba_test = model.predict_proba(X_test)[:, 1]
+        display_validation_panel(selected_features, y_test, y_pred_proba_test, cutoff)
+    
+    with tab_regularization:
+        st.header("📉 Caminho de Regularização")
+        display_regularization_path(selected_features)
+    
+    with tab_benchmark:
+        st.header("🏁 Benchmark de Solvers e Modelos")
+        display_benchmark(selected_features)
+    
+    with tab_scorecard:
+        st.header("🧾 Scorecard de Pontos")
+        display_scorecard(model, selected_features, X_test, y_test, production_data, cutoff)
+    
+    with tab_drift:
+        st.header("📡 Monitoramento de Drift")
+        display_drift_monitor(model, selected_features, X_train, production_data)
+    
+    with tab_loss:
+        st.header("🎲 Distribuição de Perdas da Carteira")
+        pd_production = apply_calibration(
+            calibrators, calibration_method, model.predict_proba(production_data[selected_features])[:, 1]
+        )
+        display_portfolio_loss(pd_production, production_data)
+    
     with tab4:
         st.header("📋 Visualização dos Dados")
         
@@ -787,12 +3321,18 @@ def render():
         Este sistema foi desenvolvido para ensinar aos estagiários como funciona a modelagem de risco de crédito utilizando regressão logística.
         
         ### 📊 Funcionalidades
-        1. **Seleção de Variáveis**: Permite escolher quais variáveis usar no modelo
+        1. **Seleção de Variáveis**: Permite escolher quais variáveis usar no modelo, manualmente ou por busca automática (forward, backward ou melhor subconjunto)
         2. **Treinamento do Modelo**: Treina um modelo de regressão logística com divisão 70/30
         3. **Visualizações**: Gera gráficos da curva S, ROC e matriz de confusão
         4. **Estatísticas**: Exibe métricas detalhadas do modelo
         5. **Aplicação em Produção**: Aplica o modelo em novos dados
         6. **Comparação**: Compara resultados com dados reais (quando disponíveis)
+        7. **Validação**: Validação cruzada k-fold e intervalos de confiança por bootstrap
+        8. **Regularização**: Caminhos dos coeficientes e AUC de validação para penalidades L1, L2 e Elastic-Net
+        9. **Benchmark**: Compara solvers da regressão logística e gradient boosting em tempo, memória, AUC e calibração
+        10. **Scorecard**: Converte o modelo em um scorecard de pontos inteiros com escala PDO
+        11. **Monitoramento**: Acompanha PSI/CSI entre treinamento e lotes de produção
+        12. **Perda da Carteira**: Simula EL, VaR e ES da carteira de produção pelo modelo de Vasicek
         
         ### 🔧 Tecnologias Utilizadas
         - **Streamlit**: Interface web interativa
@@ -1,8 +1,34 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 
+def calcular_margem_liquida(pl, yield_carteira, taxa_variavel, custos_fixos):
+    """
+    Margem líquida (%) do FIDC. Aceita escalares ou arrays: com broadcasting do NumPy, a mesma
+    fórmula calcula um ponto, uma curva ou uma superfície inteira (ex.: PL × yield).
+    PL em R$ milhões, yield e taxas em % a.a., custos fixos em R$/ano.
+    """
+    receita = np.asarray(pl) * 1_000_000 * np.asarray(yield_carteira) / 100
+    resultado = receita - custos_fixos - np.asarray(pl) * 1_000_000 * np.asarray(taxa_variavel) / 100
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(receita > 0, resultado / receita * 100, -100.0)
+
+
+def calcular_pl_breakeven(yield_carteira, taxa_variavel, custos_fixos):
+    """
+    PL de equilíbrio (R$ milhões) em forma fechada: o resultado é linear no PL,
+    PL × (yield - taxas variáveis) - custos fixos = 0  =>  PL* = custos fixos / spread líquido.
+    Sem spread líquido positivo não há equilíbrio (infinito).
+    """
+    spread = (np.asarray(yield_carteira) - np.asarray(taxa_variavel)) / 100
+    
+    with np.errstate(divide='ignore'):
+        return np.where(spread > 0, custos_fixos / 1_000_000 / spread, np.inf)
+
+
 def run():
     st.title("📊 Módulo 1: Simulador de Viabilidade Econômica")
     st.markdown("### O Breakeven: Por que FIDCs pequenos são inviáveis?")
@@ -236,39 +262,24 @@ def run():
     começa a ser viável.
     """)
     
-    # Calcular cenários
-    pls_simulacao = list(range(5, 105, 5))
-    resultados_simulacao = []
-    
-    for pl_sim in pls_simulacao:
-        receita_sim = pl_sim * 1_000_000 * yield_carteira / 100
-        custo_var_sim = pl_sim * 1_000_000 * (taxa_gestao + taxa_administracao) / 100
-        resultado_sim = receita_sim - custos_fixos_total - custo_var_sim
-        margem_sim = (resultado_sim / receita_sim * 100) if receita_sim > 0 else -100
-        
-        resultados_simulacao.append({
-            'PL (R$ milhões)': pl_sim,
-            'Margem Líquida (%)': margem_sim,
-            'Resultado (R$ milhões)': resultado_sim / 1_000_000
-        })
-    
-    df_sensibilidade = pd.DataFrame(resultados_simulacao)
+    # Curva de sensibilidade em grade fina (vetorizada) e breakeven exato em forma fechada
+    taxa_variavel = taxa_gestao + taxa_administracao
+    pls_simulacao = np.linspace(5, 100, 400)
+    margens_simulacao = calcular_margem_liquida(pls_simulacao, yield_carteira, taxa_variavel, custos_fixos_total)
     
-    # Encontrar breakeven
-    df_positivo = df_sensibilidade[df_sensibilidade['Margem Líquida (%)'] > 0]
-    pl_breakeven = df_positivo['PL (R$ milhões)'].min() if len(df_positivo) > 0 else None
+    pl_breakeven = float(calcular_pl_breakeven(yield_carteira, taxa_variavel, custos_fixos_total))
+    pl_breakeven = pl_breakeven if np.isfinite(pl_breakeven) else None
     
     # Gráfico de sensibilidade
     fig2 = go.Figure()
     
     # Linha de margem
     fig2.add_trace(go.Scatter(
-        x=df_sensibilidade['PL (R$ milhões)'],
-        y=df_sensibilidade['Margem Líquida (%)'],
-        mode='lines+markers',
+        x=pls_simulacao,
+        y=margens_simulacao,
+        mode='lines',
         name='Margem Líquida',
-        line=dict(color='#1f77b4', width=3),
-        marker=dict(size=8)
+        line=dict(color='#1f77b4', width=3)
     ))
     
     # Linha de breakeven (margem = 0)
@@ -281,21 +292,20 @@ def run():
     )
     
     # Destacar o PL atual
-    margem_atual = df_sensibilidade[df_sensibilidade['PL (R$ milhões)'] == pl_alvo]['Margem Líquida (%)'].values[0]
     fig2.add_trace(go.Scatter(
         x=[pl_alvo],
-        y=[margem_atual],
+        y=[margem_liquida],
         mode='markers',
         name='PL Atual',
         marker=dict(size=15, color='red', symbol='star')
     ))
     
-    if pl_breakeven:
+    if pl_breakeven and 5 <= pl_breakeven <= 100:
         fig2.add_vline(
             x=pl_breakeven,
             line_dash="dot",
             line_color="green",
-            annotation_text=f"Breakeven: R$ {pl_breakeven:.0f}M",
+            annotation_text=f"Breakeven: R$ {pl_breakeven:.1f}M",
             annotation_position="top"
         )
     
@@ -303,6 +313,7 @@ def run():
         title="Sensibilidade da Margem Líquida ao Tamanho do PL",
         xaxis_title="Patrimônio Líquido (R$ milhões)",
         yaxis_title="Margem Líquida (%)",
+        yaxis_range=[max(-100, float(margens_simulacao.min())), max(10, float(margens_simulacao.max()) + 5)],
         height=500,
         hovermode='x unified'
     )
@@ -311,16 +322,108 @@ def run():
     
     if pl_breakeven:
         st.info(f"""
-        📍 **Ponto de Equilíbrio Identificado:** R$ {pl_breakeven:.0f} milhões
+        📍 **Ponto de Equilíbrio:** R$ {pl_breakeven:.2f} milhões
         
         Este é o tamanho mínimo de PL necessário para que a estrutura não opere com prejuízo, 
         considerando os parâmetros atuais de yield ({yield_carteira:.1f}% a.a.) e estrutura de custos.
+        Como o resultado é linear no PL, o equilíbrio é calculado de forma exata: 
+        custos fixos ÷ (yield − taxas de gestão e administração).
         
         **Importante:** Na prática, recomenda-se operar com margem de segurança de pelo menos 5% 
         para absorver variações e imprevistos.
         """)
     else:
-        st.warning("⚠️ Nenhum ponto de equilíbrio encontrado no range simulado. A estrutura pode ser inviável.")
+        st.warning("⚠️ O yield não cobre as taxas de gestão e administração: não existe PL de equilíbrio.")
+    
+    # Superfície de margem em duas dimensões
+    st.markdown("### 🗺️ Superfície de Margem: PL × Yield ou PL × Taxa de Gestão")
+    
+    st.write("""
+    O mapa mostra a margem líquida para todas as combinações de PL e de um segundo parâmetro. 
+    A grade inteira é calculada de uma vez (broadcasting do NumPy), e a linha preta é a fronteira 
+    de equilíbrio exata: à direita dela, a estrutura é viável.
+    """)
+    
+    col_s1, col_s2 = st.columns(2)
+    
+    with col_s1:
+        eixo_superficie = st.radio(
+            "Segundo eixo",
+            ["Yield da Carteira", "Taxa de Gestão"],
+            horizontal=True,
+            key="m03_m1_eixo_superficie"
+        )
+    
+    with col_s2:
+        resolucao = st.select_slider(
+            "Resolução da grade (pontos por eixo)",
+            options=[100, 200, 400, 600, 800, 1000],
+            value=200,
+            key="m03_m1_resolucao_superficie"
+        )
+    
+    pls_grade = np.linspace(5, 100, resolucao)
+    
+    if eixo_superficie == "Yield da Carteira":
+        eixo_y = np.linspace(8.0, 25.0, resolucao)
+        titulo_eixo_y = "Yield da Carteira (% a.a.)"
+        valor_atual_y = yield_carteira
+        margens_grade = calcular_margem_liquida(
+            pls_grade[np.newaxis, :], eixo_y[:, np.newaxis], taxa_variavel, custos_fixos_total
+        )
+        fronteira = calcular_pl_breakeven(eixo_y, taxa_variavel, custos_fixos_total)
+    else:
+        eixo_y = np.linspace(0.5, 3.0, resolucao)
+        titulo_eixo_y = "Taxa de Gestão (% a.a.)"
+        valor_atual_y = taxa_gestao
+        margens_grade = calcular_margem_liquida(
+            pls_grade[np.newaxis, :], yield_carteira, eixo_y[:, np.newaxis] + taxa_administracao, custos_fixos_total
+        )
+        fronteira = calcular_pl_breakeven(yield_carteira, eixo_y + taxa_administracao, custos_fixos_total)
+    
+    fig_superficie = go.Figure()
+    
+    fig_superficie.add_trace(go.Heatmap(
+        x=pls_grade,
+        y=eixo_y,
+        z=np.round(margens_grade, 1),
+        zmin=-50,
+        zmax=max(float(margens_grade.max()), 1.0),
+        zmid=0,
+        colorscale='RdYlGn',
+        colorbar=dict(title="Margem (%)"),
+        hovertemplate="PL: R$ %{x:.1f}M<br>" + titulo_eixo_y + ": %{y:.2f}<br>Margem: %{z:.1f}%<extra></extra>"
+    ))
+    
+    # Fronteira de equilíbrio em forma fechada (apenas onde cai dentro da grade)
+    dentro = fronteira <= pls_grade[-1]
+    fig_superficie.add_trace(go.Scatter(
+        x=fronteira[dentro],
+        y=eixo_y[dentro],
+        mode='lines',
+        name='Breakeven (margem = 0%)',
+        line=dict(color='black', width=3)
+    ))
+    
+    fig_superficie.add_trace(go.Scatter(
+        x=[pl_alvo],
+        y=[valor_atual_y],
+        mode='markers',
+        name='Estrutura Atual',
+        marker=dict(size=15, color='white', symbol='star', line=dict(color='black', width=1))
+    ))
+    
+    fig_superficie.update_layout(
+        title=f"Margem Líquida (%) - PL × {eixo_superficie}",
+        xaxis_title="Patrimônio Líquido (R$ milhões)",
+        yaxis_title=titulo_eixo_y,
+        xaxis_range=[pls_grade[0], pls_grade[-1]],
+        yaxis_range=[eixo_y[0], eixo_y[-1]],
+        height=550,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02)
+    )
+    
+    st.plotly_chart(fig_superficie, use_container_width=True)
     
     # Tabela de decomposição de custos
     st.markdown("---")
@@ -2,6 +2,339 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
+from scipy.special import ndtr, ndtri
+from scipy.signal import lfilter
+from plotly.subplots import make_subplots
+
+# =============================================================================
+# WATERFALL DE PERDAS (N COTAS)
+# =============================================================================
+
+def pontos_de_ligacao(espessuras):
+    """
+    Pontos de ligação (attachment) e desligamento (detachment) de cada cota a partir das espessuras,
+    ordenadas da base (primeira perda) para o topo: a cota k ocupa [soma das anteriores, + espessura).
+    """
+    desligamento = np.cumsum(espessuras, dtype=np.float64)
+    return desligamento - np.asarray(espessuras, dtype=np.float64), desligamento
+
+
+def aplicar_waterfall(perdas, ligacao, desligamento):
+    """
+    Baixa de cada cota para qualquer array de perdas da carteira (ex.: milhões de cenários):
+    a cota [a, d) absorve clip(perda - a, 0, d - a). Retorna shape perdas.shape + (n_cotas,).
+    """
+    perdas = np.asarray(perdas, dtype=np.float64)[..., np.newaxis]
+    return np.clip(perdas - ligacao, 0.0, desligamento - ligacao)
+
+
+def grade_de_estresse(subordinacao, perdas, fracao_mezanino):
+    """
+    Baixa (% de cada cota) de Júnior, Mezanino e Sênior em todas as combinações de subordinação,
+    perda da carteira e fração da subordinação alocada ao Mezanino, em uma única chamada broadcast
+    do waterfall. Retorna shape (subordinação, perda, fração do mezanino, cota); tudo em fração do PL.
+    """
+    sub = np.asarray(subordinacao, dtype=np.float64)[:, np.newaxis, np.newaxis]
+    mezanino = sub * np.asarray(fracao_mezanino, dtype=np.float64)[np.newaxis, np.newaxis, :]
+    junior = sub - mezanino
+    
+    # Pontos de ligação/desligamento por célula: Júnior [0, j), Mezanino [j, s), Sênior [s, 1)
+    ligacao = np.stack(np.broadcast_arrays(np.zeros_like(junior), junior, sub), axis=-1)
+    desligamento = np.stack(np.broadcast_arrays(junior, sub, np.ones_like(junior)), axis=-1)
+    
+    baixa = aplicar_waterfall(np.asarray(perdas)[np.newaxis, :, np.newaxis], ligacao, desligamento)
+    espessura = desligamento - ligacao
+    return np.divide(baixa, espessura, out=np.zeros_like(baixa), where=espessura > 0)
+
+
+# =============================================================================
+# MOTOR DE FLUXO DE CAIXA DA CARTEIRA (MONTE CARLO)
+# =============================================================================
+
+def pagar_sequencial(caixa, devidos):
+    """
+    Distribui o caixa disponível (caminhos,) pela ordem de senioridade sobre os valores devidos
+    (caminhos × cotas): cada cota recebe o que sobra após as anteriores, via soma acumulada.
+    """
+    pago_acumulado = np.minimum(np.cumsum(devidos, axis=1), caixa[:, np.newaxis])
+    return np.diff(pago_acumulado, axis=1, prepend=0.0)
+
+
+def abater_cupons_primeiro(pagamento, principal, cupons):
+    """Aplica o pagamento de cada cota primeiro aos cupons em aberto e o restante ao principal"""
+    pago_cupons = np.minimum(pagamento, cupons)
+    return principal - (pagamento - pago_cupons), cupons - pago_cupons
+
+
+def taxa_interna_retorno(fluxos, iteracoes=60):
+    """
+    TIR mensal de cada linha de fluxos (..., meses + 1), com aporte no mês 0 e recebimentos depois,
+    por bisseção vetorizada (o VPL é decrescente na taxa para esse perfil de fluxo).
+    """
+    meses = np.arange(fluxos.shape[-1])
+    baixa = np.full(fluxos.shape[:-1], -0.99)
+    alta = np.full(fluxos.shape[:-1], 1.0)
+    
+    for _ in range(iteracoes):
+        meio = (baixa + alta) / 2
+        vpl = (fluxos / (1 + meio[..., np.newaxis]) ** meses).sum(axis=-1)
+        baixa = np.where(vpl > 0, meio, baixa)
+        alta = np.where(vpl > 0, alta, meio)
+    
+    # Sem nenhum recebimento, a perda é total
+    return np.where(fluxos[..., 1:].sum(axis=-1) > 0, (baixa + alta) / 2, -1.0)
+
+
+def simular_bloco_fluxo(rng, n_caminhos, saldos_cotas, taxas_cotas, prazo_meses, meses_revolvencia,
+                        yield_aa, prazo_medio_meses, prepagamento_aa, atraso_mensal, correlacao,
+                        persistencia, taxa_cura, taxa_rolagem, recuperacao, defasagem_recuperacao, custos_aa):
+    """
+    Simula um bloco de caminhos mês a mês, vetorizado nos caminhos e nas cotas.
+    Carteira: adimplente -> atraso -> (cura ou default) -> recuperação defasada; amortização e
+    pré-pagamento sobre a carteira adimplente. Na revolvência, o principal recebido compra novos
+    recebíveis do cedente (originações); depois, amortiza as cotas em ordem de senioridade.
+    A taxa de atraso de cada mês segue um fator sistêmico AR(1) com a fórmula de Vasicek.
+    """
+    n_cotas = len(saldos_cotas)
+    pl_inicial = saldos_cotas.sum()
+    
+    yield_m = (1 + yield_aa) ** (1 / 12) - 1
+    custos_m = (1 + custos_aa) ** (1 / 12) - 1
+    prepagamento_m = 1 - (1 - prepagamento_aa) ** (1 / 12)
+    amortizacao_m = 1 / prazo_medio_meses
+    cupons_m = (1 + np.asarray(taxas_cotas)) ** (1 / 12) - 1   # a última cota (júnior) é residual
+    
+    adimplente = np.full(n_caminhos, pl_inicial)
+    atraso = np.zeros(n_caminhos)
+    caixa = np.zeros(n_caminhos)
+    principal_cotas = np.tile(saldos_cotas[:-1], (n_caminhos, 1))
+    cupons_devidos = np.zeros_like(principal_cotas)
+    recuperacoes = np.zeros((n_caminhos, prazo_meses + defasagem_recuperacao + 1))
+    
+    fluxos = np.zeros((n_caminhos, n_cotas, prazo_meses + 1))
+    fluxos[:, :, 0] = -saldos_cotas
+    perda_acumulada = np.zeros((n_caminhos, prazo_meses), dtype=np.float32)
+    defaults_acumulados = np.zeros(n_caminhos)
+    
+    limiar = ndtri(atraso_mensal)
+    fator = rng.standard_normal(n_caminhos)
+    
+    for mes in range(1, prazo_meses + 1):
+        fator = persistencia * fator + np.sqrt(1 - persistencia ** 2) * rng.standard_normal(n_caminhos)
+        taxa_atraso = ndtr((limiar - np.sqrt(correlacao) * fator) / np.sqrt(1 - correlacao))
+        
+        # Dinâmica da carteira
+        juros = adimplente * yield_m
+        custos = (adimplente + atraso) * custos_m
+        novos_atrasos = adimplente * taxa_atraso
+        # Rolagem para default primeiro; a cura incide só sobre o atraso remanescente (soma nunca passa de 100%)
+        defaults = atraso * taxa_rolagem
+        curas = (atraso - defaults) * taxa_cura
+        amortizacao = (adimplente - novos_atrasos) * amortizacao_m
+        prepagamento = (adimplente - novos_atrasos - amortizacao) * prepagamento_m
+        
+        adimplente = adimplente - novos_atrasos - amortizacao - prepagamento + curas
+        atraso = atraso + novos_atrasos - curas - defaults
+        recuperacoes[:, mes + defasagem_recuperacao] += defaults * recuperacao
+        
+        principal = amortizacao + prepagamento
+        if mes <= meses_revolvencia:
+            # Originações do cedente: o principal recebido é reinvestido em novos recebíveis
+            adimplente += principal
+            principal = 0.0
+        
+        caixa = np.maximum(caixa + juros + principal + recuperacoes[:, mes] - custos, 0.0)
+        
+        # Cupons acumulam sobre o saldo devido; na revolvência só os cupons são pagos
+        cupons_devidos += (principal_cotas + cupons_devidos) * cupons_m[:-1]
+        devido = cupons_devidos if mes <= meses_revolvencia else principal_cotas + cupons_devidos
+        pagamento = pagar_sequencial(caixa, devido)
+        principal_cotas, cupons_devidos = abater_cupons_primeiro(pagamento, principal_cotas, cupons_devidos)
+        caixa -= pagamento.sum(axis=1)
+        fluxos[:, :-1, mes] = pagamento
+        
+        defaults_acumulados += defaults
+        perda_acumulada[:, mes - 1] = (defaults_acumulados - recuperacoes[:, :mes + 1].sum(axis=1)) / pl_inicial
+    
+    # Liquidação no vencimento: carteira adimplente ao par, atrasos e recuperações futuras pela taxa de recuperação
+    ativos_finais = caixa + adimplente + atraso * recuperacao + recuperacoes[:, prazo_meses + 1:].sum(axis=1)
+    pagamento = pagar_sequencial(ativos_finais, principal_cotas + cupons_devidos)
+    principal_cotas, cupons_devidos = abater_cupons_primeiro(pagamento, principal_cotas, cupons_devidos)
+    fluxos[:, :-1, prazo_meses] += pagamento
+    fluxos[:, -1, prazo_meses] = ativos_finais - pagamento.sum(axis=1)
+    
+    # Perda de cada cota: principal não devolvido (sênior/mezanino) ou capital não devolvido (júnior);
+    # os cupons em aberto no vencimento são medidos à parte
+    recebido = fluxos[:, :, 1:].sum(axis=2)
+    perdas = np.empty((n_caminhos, n_cotas))
+    perdas[:, :-1] = np.clip(principal_cotas / saldos_cotas[:-1], 0, 1)
+    perdas[:, -1] = np.clip(1 - recebido[:, -1] / saldos_cotas[-1], 0, 1)
+    cupons_nao_pagos = np.zeros((n_caminhos, n_cotas))
+    cupons_nao_pagos[:, :-1] = cupons_devidos / saldos_cotas[:-1]
+    
+    retornos = (1 + taxa_interna_retorno(fluxos)) ** 12 - 1
+    
+    return retornos, perdas, cupons_nao_pagos, perda_acumulada
+
+
+@st.cache_data(show_spinner=False)
+def simular_fluxo_carteira(saldos_cotas, taxas_cotas, n_caminhos=10_000, semente=42, tamanho_bloco=2_000, **parametros):
+    """
+    Monte Carlo do fluxo de caixa mensal da carteira em blocos de caminhos: a memória fica limitada
+    ao tamanho do bloco, e cada bloco tem seu próprio gerador derivado da semente (reprodutível).
+    Retorna retornos anualizados, perdas de principal e cupons não pagos (% do aporte) por caminho
+    e cota, e a perda líquida acumulada da carteira mês a mês.
+    """
+    saldos_cotas = np.asarray(saldos_cotas, dtype=np.float64)
+    n_blocos = int(np.ceil(n_caminhos / tamanho_bloco))
+    geradores = [np.random.default_rng(s) for s in np.random.SeedSequence(semente).spawn(n_blocos)]
+    
+    resultados = [
+        simular_bloco_fluxo(
+            geradores[b], min(tamanho_bloco, n_caminhos - b * tamanho_bloco),
+            saldos_cotas, taxas_cotas, **parametros
+        )
+        for b in range(n_blocos)
+    ]
+    
+    retornos, perdas, cupons_nao_pagos, perda_acumulada = (np.concatenate(partes) for partes in zip(*resultados))
+    return retornos, perdas, cupons_nao_pagos, perda_acumulada
+
+
+# =============================================================================
+# PERDA ESPERADA E RATING IMPLÍCITO POR COTA
+# =============================================================================
+
+# Escala idealizada de perda esperada (horizonte de 5 anos, aproximação da tabela de Moody's):
+# o rating implícito é o melhor cuja perda esperada máxima comporta a perda esperada da cota
+ESCALA_PERDA_ESPERADA = [
+    ('Aaa', 0.000016), ('Aa1', 0.000171), ('Aa2', 0.000374), ('Aa3', 0.000700),
+    ('A1', 0.001202), ('A2', 0.001899), ('A3', 0.003490),
+    ('Baa1', 0.005412), ('Baa2', 0.007722), ('Baa3', 0.017776),
+    ('Ba1', 0.031020), ('Ba2', 0.047740), ('Ba3', 0.067605),
+    ('B1', 0.089420), ('B2', 0.113700), ('B3', 0.150975), ('Caa', 0.246372)
+]
+RATINGS = [rating for rating, _ in ESCALA_PERDA_ESPERADA] + ['Ca/C']
+LIMITES_PERDA_ESPERADA = np.array([limite for _, limite in ESCALA_PERDA_ESPERADA])
+
+
+@st.cache_data(show_spinner=False)
+def distribuicao_perda_vasicek(pd_horizonte, correlacao, lgd, n_pontos=4001):
+    """
+    Distribuição analítica de perdas de uma carteira granular (Vasicek, grande carteira) na grade
+    x ∈ [0, 1] (% do PL): P(L > x) pela CDF fechada da taxa de default, e E[min(L, x)] = ∫ P(L > u) du.
+    """
+    x = np.linspace(0, 1, n_pontos)
+    taxa_default = np.clip(x / lgd, 1e-12, 1 - 1e-12)
+    cdf = ndtr((np.sqrt(1 - correlacao) * ndtri(taxa_default) - ndtri(pd_horizonte)) / np.sqrt(correlacao))
+    sobrevivencia = np.where(x < lgd, 1 - cdf, 0.0)
+    
+    perda_limitada = np.concatenate([[0.0], np.cumsum((sobrevivencia[1:] + sobrevivencia[:-1]) / 2 * np.diff(x))])
+    return x, sobrevivencia, perda_limitada
+
+
+def distribuicao_perda_empirica(perdas, n_pontos=4001):
+    """Mesma grade a partir de perdas simuladas: E[min(L, x)] pelas somas acumuladas das perdas ordenadas"""
+    x = np.linspace(0, 1, n_pontos)
+    ordenadas = np.sort(np.clip(np.asarray(perdas, dtype=np.float64), 0, 1))
+    n = len(ordenadas)
+    
+    abaixo = np.searchsorted(ordenadas, x, side='right')
+    somas = np.concatenate([[0.0], np.cumsum(ordenadas)])
+    return x, (n - abaixo) / n, (somas[abaixo] + x * (n - abaixo)) / n
+
+
+def rating_implicito(perda_esperada):
+    """Rating implícito pela escala idealizada de perda esperada (aceita arrays)"""
+    return np.array(RATINGS)[np.searchsorted(LIMITES_PERDA_ESPERADA, perda_esperada, side='left')]
+
+
+def perda_esperada_cotas(distribuicao, ligacao, desligamento):
+    """
+    Perda esperada (% da cota) e probabilidade de primeira perda de cada cota [a, d):
+    EL = (E[min(L, d)] - E[min(L, a)]) / (d - a) e P(L > a), por interpolação na grade pré-calculada.
+    """
+    x, sobrevivencia, perda_limitada = distribuicao
+    ligacao, desligamento = np.asarray(ligacao), np.asarray(desligamento)
+    
+    espessura = np.maximum(desligamento - ligacao, 1e-12)
+    perda_esperada = (np.interp(desligamento, x, perda_limitada) - np.interp(ligacao, x, perda_limitada)) / espessura
+    return perda_esperada, np.interp(ligacao, x, sobrevivencia)
+
+
+def mapa_rating_senior(distribuicao):
+    """
+    Mapa pré-calculado subordinação -> (perda esperada, rating) da sênior em toda a grade:
+    a sênior é a cota [s, 1), então variar a subordinação é apenas uma consulta ao mapa.
+    """
+    x, _, perda_limitada = distribuicao
+    subordinacao = x[:-1]
+    perda_esperada = (perda_limitada[-1] - perda_limitada[:-1]) / (1 - subordinacao)
+    return subordinacao, perda_esperada, rating_implicito(perda_esperada)
+
+
+# =============================================================================
+# MONITORAMENTO DIÁRIO DO ÍNDICE DE SUBORDINAÇÃO
+# =============================================================================
+
+@st.cache_data(show_spinner=False)
+def simular_indice_subordinacao(pl_total, senior_inicial, n_caminhos=5_000, dias=504, semente=42, tamanho_bloco=2_000,
+                                yield_aa=0.20, senior_aa=0.14, custos_aa=0.02, perda_aa=0.04, volatilidade=0.8,
+                                persistencia=0.99, eventos_aa=2.0, tamanho_evento=0.01, inicio_amortizacao=252):
+    """
+    Índice de subordinação diário (caminhos × dias úteis), sem laço nos dias: o fator de crédito AR(1)
+    sai de um filtro linear (lfilter) e o patrimônio, de somas acumuladas do resultado diário.
+    - perdas: taxa lognormal guiada pelo fator + eventos de default concentrados (Poisson);
+    - resultado: yield menos custos sobre o saldo programado da carteira, menos o cupom da sênior;
+    - a sênior amortiza linearmente a partir de `inicio_amortizacao`, pagando com a carteira;
+    - o excesso de spread fica retido no fundo (recompõe a subordinação).
+    """
+    dia = np.arange(1, dias + 1)
+    amortizado = senior_inicial * np.clip((dia - inicio_amortizacao) / max(dias - inicio_amortizacao, 1), 0, 1)
+    amortizado_anterior = np.concatenate([[0.0], amortizado[:-1]])
+    
+    saldo_carteira = pl_total - amortizado_anterior
+    saldo_senior = senior_inicial - amortizado_anterior
+    resultado = ((yield_aa - custos_aa) * saldo_carteira - senior_aa * saldo_senior) / 252
+    
+    n_blocos = int(np.ceil(n_caminhos / tamanho_bloco))
+    geradores = [np.random.default_rng(s) for s in np.random.SeedSequence(semente).spawn(n_blocos)]
+    indice = np.empty((n_caminhos, dias), dtype=np.float32)
+    
+    for b, rng in enumerate(geradores):
+        linhas = slice(b * tamanho_bloco, min((b + 1) * tamanho_bloco, n_caminhos))
+        n = linhas.stop - linhas.start
+        
+        fator = lfilter([np.sqrt(1 - persistencia ** 2)], [1, -persistencia], rng.standard_normal((n, dias)), axis=1)
+        taxa_perda = perda_aa / 252 * np.exp(volatilidade * fator - volatilidade ** 2 / 2)
+        eventos = rng.poisson(eventos_aa / 252, (n, dias)) * tamanho_evento
+        
+        ativos = pl_total - amortizado + np.cumsum(resultado - (taxa_perda + eventos) * saldo_carteira, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            indice[linhas] = np.where(ativos > 0, 1 - (senior_inicial - amortizado) / ativos, 0.0)
+    
+    return indice
+
+
+def analisar_desenquadramentos(indice, indice_minimo):
+    """
+    Eventos de desenquadramento por caminho, vetorizados: dia do primeiro desenquadramento (-1 se nunca),
+    dias até a recomposição desse primeiro evento (-1 se não recomposto no horizonte) e número de episódios.
+    """
+    abaixo = indice < indice_minimo
+    anterior = np.zeros_like(abaixo)
+    anterior[:, 1:] = abaixo[:, :-1]
+    
+    houve = abaixo.any(axis=1)
+    primeiro = np.where(houve, abaixo.argmax(axis=1), -1)
+    
+    enquadrado_depois = ~abaixo & (np.arange(indice.shape[1]) > primeiro[:, np.newaxis])
+    recomposto = houve & enquadrado_depois.any(axis=1)
+    dias_recomposicao = np.where(recomposto, enquadrado_depois.argmax(axis=1) - primeiro, -1)
+    
+    episodios = (abaixo & ~anterior).sum(axis=1)
+    return primeiro, dias_recomposicao, episodios
+
 
 def run():
     st.title("🛡️ Módulo 3: Laboratório de Subordinação e Risco")
@@ -97,71 +430,39 @@ def run():
     with col_visual:
         st.markdown("### 📊 Visualização da Estrutura de Capital")
         
-        # Cálculos
-        if not incluir_mezanino:
-            # Estrutura simples: Sênior + Júnior
-            senior_inicial = pl_total * (1 - subordinacao_pct/100)
-            junior_inicial = pl_total * (subordinacao_pct/100)
-            mezanino_inicial = 0
-            
-            # Lógica de absorção de prejuízo
-            if perda_carteira <= junior_inicial:
-                junior_final = junior_inicial - perda_carteira
-                senior_final = senior_inicial
-                mezanino_final = 0
-                status = "✅ Cota Sênior Intacta"
-                status_cor = "success"
-                explicacao = f"A perda de R$ {perda_carteira:.1f}M foi completamente absorvida pela cota Júnior (R$ {junior_inicial:.1f}M). O 'escudo' funcionou perfeitamente."
-            else:
-                # Perda consumiu toda a Júnior e atingiu a Sênior
-                junior_final = 0
-                dano_na_senior = perda_carteira - junior_inicial
-                senior_final = senior_inicial - dano_na_senior
-                mezanino_final = 0
-                status = "🚨 PERDA NA SÊNIOR - Desenquadramento Crítico"
-                status_cor = "error"
-                explicacao = f"A perda de R$ {perda_carteira:.1f}M excedeu a proteção da Júnior (R$ {junior_inicial:.1f}M). A Sênior sofreu prejuízo de R$ {dano_na_senior:.1f}M."
-        
+        # Estrutura de capital, da base (primeira perda) para o topo: Júnior, Mezanino (se houver), Sênior
+        senior_inicial = pl_total * (1 - subordinacao_pct / 100)
+        if incluir_mezanino:
+            junior_inicial = mezanino_inicial = pl_total * subordinacao_pct / 200
         else:
-            # Estrutura com Mezanino: Sênior + Mezanino + Júnior
-            subordinacao_total = subordinacao_pct
-            junior_pct = subordinacao_total / 2
-            mezanino_pct = subordinacao_total / 2
-            senior_pct = 100 - subordinacao_total
-            
-            senior_inicial = pl_total * (senior_pct/100)
-            mezanino_inicial = pl_total * (mezanino_pct/100)
-            junior_inicial = pl_total * (junior_pct/100)
-            
-            # Lógica de absorção em três camadas
-            if perda_carteira <= junior_inicial:
-                # Perda absorvida apenas pela Júnior
-                junior_final = junior_inicial - perda_carteira
-                mezanino_final = mezanino_inicial
-                senior_final = senior_inicial
-                status = "✅ Cotas Sênior e Mezanino Intactas"
-                status_cor = "success"
+            junior_inicial, mezanino_inicial = pl_total * subordinacao_pct / 100, 0
+        
+        espessuras = np.array([junior_inicial, mezanino_inicial, senior_inicial])
+        ligacao, desligamento = pontos_de_ligacao(espessuras)
+        junior_final, mezanino_final, senior_final = espessuras - aplicar_waterfall(perda_carteira, ligacao, desligamento)
+        
+        if perda_carteira <= junior_inicial:
+            status = "✅ Cotas Sênior e Mezanino Intactas" if incluir_mezanino else "✅ Cota Sênior Intacta"
+            status_cor = "success"
+            if incluir_mezanino:
                 explicacao = f"A perda de R$ {perda_carteira:.1f}M foi absorvida pela Júnior. Mezanino e Sênior protegidos."
-            
-            elif perda_carteira <= (junior_inicial + mezanino_inicial):
-                # Júnior zerada, Mezanino parcialmente atingida
-                junior_final = 0
-                dano_no_mezanino = perda_carteira - junior_inicial
-                mezanino_final = mezanino_inicial - dano_no_mezanino
-                senior_final = senior_inicial
-                status = "⚠️ Júnior Eliminada, Mezanino Atingido, Sênior Protegida"
-                status_cor = "warning"
-                explicacao = f"Júnior (R$ {junior_inicial:.1f}M) totalmente consumida. Mezanino perdeu R$ {dano_no_mezanino:.1f}M. Sênior permanece intacta."
-            
             else:
-                # Júnior e Mezanino zeradas, Sênior atingida
-                junior_final = 0
-                mezanino_final = 0
-                dano_na_senior = perda_carteira - junior_inicial - mezanino_inicial
-                senior_final = senior_inicial - dano_na_senior
-                status = "🚨 PERDA NA SÊNIOR - Desenquadramento Crítico"
-                status_cor = "error"
+                explicacao = f"A perda de R$ {perda_carteira:.1f}M foi completamente absorvida pela cota Júnior (R$ {junior_inicial:.1f}M). O 'escudo' funcionou perfeitamente."
+        
+        elif perda_carteira <= junior_inicial + mezanino_inicial:
+            dano_no_mezanino = mezanino_inicial - mezanino_final
+            status = "⚠️ Júnior Eliminada, Mezanino Atingido, Sênior Protegida"
+            status_cor = "warning"
+            explicacao = f"Júnior (R$ {junior_inicial:.1f}M) totalmente consumida. Mezanino perdeu R$ {dano_no_mezanino:.1f}M. Sênior permanece intacta."
+        
+        else:
+            dano_na_senior = senior_inicial - senior_final
+            status = "🚨 PERDA NA SÊNIOR - Desenquadramento Crítico"
+            status_cor = "error"
+            if incluir_mezanino:
                 explicacao = f"Júnior e Mezanino eliminadas. Sênior sofreu prejuízo de R$ {dano_na_senior:.1f}M."
+            else:
+                explicacao = f"A perda de R$ {perda_carteira:.1f}M excedeu a proteção da Júnior (R$ {junior_inicial:.1f}M). A Sênior sofreu prejuízo de R$ {dano_na_senior:.1f}M."
         
         # Exibir status
         if status_cor == "success":
@@ -367,39 +668,11 @@ def run():
     Identifique os **pontos de ruptura** onde cada cota é eliminada.
     """)
     
-    # Gerar cenários de 0% a 60% de perda
-    perdas_simuladas = np.linspace(0, pl_total * 0.6, 50)
-    
-    senior_valores = []
-    mezanino_valores = []
-    junior_valores = []
-    
-    for perda_sim in perdas_simuladas:
-        if not incluir_mezanino:
-            if perda_sim <= junior_inicial:
-                senior_valores.append(senior_inicial)
-                junior_valores.append(junior_inicial - perda_sim)
-                mezanino_valores.append(0)
-            else:
-                dano_senior = perda_sim - junior_inicial
-                senior_valores.append(max(0, senior_inicial - dano_senior))
-                junior_valores.append(0)
-                mezanino_valores.append(0)
-        else:
-            if perda_sim <= junior_inicial:
-                senior_valores.append(senior_inicial)
-                mezanino_valores.append(mezanino_inicial)
-                junior_valores.append(junior_inicial - perda_sim)
-            elif perda_sim <= (junior_inicial + mezanino_inicial):
-                dano_mezanino = perda_sim - junior_inicial
-                senior_valores.append(senior_inicial)
-                mezanino_valores.append(mezanino_inicial - dano_mezanino)
-                junior_valores.append(0)
-            else:
-                dano_senior = perda_sim - junior_inicial - mezanino_inicial
-                senior_valores.append(max(0, senior_inicial - dano_senior))
-                mezanino_valores.append(0)
-                junior_valores.append(0)
+    # Cenários de 0% a 60% de perda, todos de uma vez pelo mesmo waterfall
+    perdas_simuladas = np.linspace(0, pl_total * 0.6, 300)
+    junior_valores, mezanino_valores, senior_valores = (
+        espessuras - aplicar_waterfall(perdas_simuladas, ligacao, desligamento)
+    ).T
     
     # Gráfico de área empilhada
     fig2 = go.Figure()
@@ -491,6 +764,445 @@ def run():
             help="Perda que zeraria todo o patrimônio"
         )
     
+    # Simulação do fluxo de caixa da carteira
+    st.markdown("---")
+    st.markdown("## 💸 Fluxo de Caixa da Carteira: Simulação Monte Carlo")
+    
+    st.write("""
+    A análise acima aplica uma única perda estática. Aqui a carteira de recebíveis é simulada **mês a mês** 
+    em milhares de cenários: originações do cedente durante a revolvência, amortização, pré-pagamento, 
+    atrasos, curas, defaults e recuperações. O caixa paga custos e cupons em ordem de senioridade, 
+    e a Júnior fica com o residual. O resultado é a **distribuição** de retornos e perdas de cada cota.
+    """)
+    
+    with st.expander("⚙️ Parâmetros da Carteira e das Cotas", expanded=False):
+        col_fc1, col_fc2, col_fc3 = st.columns(3)
+        
+        with col_fc1:
+            prazo_meses = st.slider("Prazo do Fundo (meses)", 12, 60, 36, 6, key="m03_fc_prazo")
+            meses_revolvencia = st.slider("Período de Revolvência (meses)", 0, 24, 12, 3, key="m03_fc_revolvencia")
+            yield_aa = st.slider("Yield da Carteira (% a.a.)", 10.0, 40.0, 24.0, 1.0, key="m03_fc_yield") / 100
+            prazo_medio_meses = st.slider("Prazo Médio dos Recebíveis (meses)", 1, 24, 4, key="m03_fc_prazo_medio")
+            prepagamento_aa = st.slider("Pré-pagamento (% a.a.)", 0.0, 30.0, 10.0, 1.0, key="m03_fc_prepagamento") / 100
+        
+        with col_fc2:
+            atraso_mensal = st.slider("Entrada em Atraso (% a.m. da carteira)", 0.5, 8.0, 2.0, 0.5, key="m03_fc_atraso") / 100
+            correlacao = st.slider("Correlação com o Ciclo de Crédito", 0.01, 0.40, 0.10, 0.01, key="m03_fc_correlacao")
+            taxa_cura = st.slider("Cura dos Atrasos não Rolados (% a.m.)", 0.0, 80.0, 40.0, 5.0, key="m03_fc_cura") / 100
+            taxa_rolagem = st.slider("Rolagem de Atraso para Default (% a.m.)", 5.0, 80.0, 30.0, 5.0, key="m03_fc_rolagem") / 100
+            recuperacao = st.slider("Recuperação dos Defaults (%)", 0.0, 80.0, 30.0, 5.0, key="m03_fc_recuperacao") / 100
+        
+        with col_fc3:
+            taxa_senior = st.slider("Remuneração Sênior (% a.a.)", 8.0, 20.0, 14.0, 0.5, key="m03_fc_senior") / 100
+            taxa_mezanino = st.slider("Remuneração Mezanino (% a.a.)", 10.0, 25.0, 18.0, 0.5, key="m03_fc_mezanino") / 100
+            custos_aa = st.slider("Custos do Fundo (% a.a. dos ativos)", 0.5, 5.0, 2.0, 0.5, key="m03_fc_custos") / 100
+            n_caminhos = st.select_slider("Cenários Simulados", [1_000, 5_000, 10_000, 20_000, 50_000], 10_000, key="m03_fc_caminhos")
+            semente = st.number_input("Semente", 0, 1_000_000, 42, key="m03_fc_semente")
+    
+    if incluir_mezanino:
+        nomes_cotas = ['Sênior', 'Mezanino', 'Júnior']
+        saldos_cotas = (senior_inicial, mezanino_inicial, junior_inicial)
+        taxas_cotas = (taxa_senior, taxa_mezanino, 0.0)
+    else:
+        nomes_cotas = ['Sênior', 'Júnior']
+        saldos_cotas = (senior_inicial, junior_inicial)
+        taxas_cotas = (taxa_senior, 0.0)
+    
+    with st.spinner("Simulando fluxos de caixa..."):
+        retornos, perdas, cupons_nao_pagos, perda_acumulada = simular_fluxo_carteira(
+            saldos_cotas, taxas_cotas, n_caminhos=n_caminhos, semente=int(semente),
+            prazo_meses=prazo_meses, meses_revolvencia=meses_revolvencia, yield_aa=yield_aa,
+            prazo_medio_meses=prazo_medio_meses, prepagamento_aa=prepagamento_aa, atraso_mensal=atraso_mensal,
+            correlacao=correlacao, persistencia=0.8, taxa_cura=taxa_cura, taxa_rolagem=taxa_rolagem,
+            recuperacao=recuperacao, defasagem_recuperacao=6, custos_aa=custos_aa
+        )
+    
+    cores_cotas = {'Sênior': '#51cf66', 'Mezanino': '#ffd43b', 'Júnior': '#ff6b6b'}
+    
+    df_fluxo = pd.DataFrame({
+        'Cota': nomes_cotas,
+        'Retorno Médio (% a.a.)': retornos.mean(axis=0) * 100,
+        'Retorno P5 (% a.a.)': np.percentile(retornos, 5, axis=0) * 100,
+        'Retorno Mediano (% a.a.)': np.median(retornos, axis=0) * 100,
+        'Retorno P95 (% a.a.)': np.percentile(retornos, 95, axis=0) * 100,
+        'Prob. de Perda (%)': (perdas > 1e-9).mean(axis=0) * 100,
+        'Perda Esperada (%)': perdas.mean(axis=0) * 100,
+        'Perda P99 (%)': np.percentile(perdas, 99, axis=0) * 100,
+        'Cupons Não Pagos Médios (%)': cupons_nao_pagos.mean(axis=0) * 100
+    })
+    st.dataframe(df_fluxo.round(2), hide_index=True, use_container_width=True)
+    
+    col_fg1, col_fg2 = st.columns(2)
+    
+    with col_fg1:
+        # Histogramas agregados no servidor (mesmas faixas para todas as cotas)
+        limites = np.linspace(max(-1.0, float(retornos.min())), float(retornos.max()) + 1e-9, 61)
+        fig_ret = go.Figure()
+        for k, nome in enumerate(nomes_cotas):
+            contagens, _ = np.histogram(retornos[:, k], bins=limites)
+            fig_ret.add_trace(go.Bar(
+                x=(limites[:-1] + limites[1:]) / 2 * 100, y=contagens / len(retornos) * 100,
+                name=nome, marker_color=cores_cotas[nome], opacity=0.7
+            ))
+        fig_ret.update_layout(
+            barmode='overlay', title="Distribuição do Retorno Anualizado (TIR) por Cota",
+            xaxis_title="Retorno (% a.a.)", yaxis_title="% dos Cenários", height=450
+        )
+        st.plotly_chart(fig_ret, use_container_width=True)
+    
+    with col_fg2:
+        meses = np.arange(1, prazo_meses + 1)
+        faixas = np.percentile(perda_acumulada, [5, 50, 95], axis=0) * 100
+        fig_perda = go.Figure()
+        fig_perda.add_trace(go.Scatter(x=meses, y=faixas[2], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig_perda.add_trace(go.Scatter(
+            x=meses, y=faixas[0], mode='lines', line=dict(width=0), fill='tonexty',
+            fillcolor='rgba(31, 119, 180, 0.2)', name='Intervalo 5%-95%'
+        ))
+        fig_perda.add_trace(go.Scatter(x=meses, y=faixas[1], mode='lines', name='Mediana', line=dict(color='#1f77b4', width=3)))
+        fig_perda.add_hline(
+            y=junior_inicial / pl_total * 100, line_dash="dash", line_color="red",
+            annotation_text="Espessura da Júnior"
+        )
+        fig_perda.update_layout(
+            title="Perda Líquida Acumulada da Carteira (% do PL)",
+            xaxis_title="Mês", yaxis_title="Perda Acumulada (%)", height=450
+        )
+        st.plotly_chart(fig_perda, use_container_width=True)
+    
+    st.caption(
+        f"{n_caminhos:,} cenários simulados em blocos de 2.000 (memória limitada ao bloco), reprodutíveis pela semente. "
+        "O excesso de spread fica retido no fundo e pertence à Júnior; após a revolvência, o caixa amortiza as cotas "
+        "em ordem de senioridade. A perda é o principal não devolvido (% do aporte); os cupons em aberto no "
+        "vencimento aparecem à parte, também em % do aporte."
+    )
+    
+    # Perda esperada e rating implícito das cotas
+    st.markdown("---")
+    st.markdown("## 🏅 Perda Esperada e Rating Implícito das Cotas")
+    
+    st.write("""
+    Agências de rating olham para a **perda esperada** de cada cota, não para um único cenário. 
+    A partir da distribuição de perdas da carteira (Vasicek analítico ou a simulação de fluxo de caixa acima), 
+    calculamos a perda esperada, a probabilidade de a cota sofrer a primeira perda e o rating implícito 
+    pela escala idealizada. O mapa subordinação → rating é pré-calculado, então mover o índice de 
+    subordinação apenas consulta o mapa.
+    """)
+    
+    col_r1, col_r2, col_r3, col_r4 = st.columns(4)
+    
+    with col_r1:
+        fonte_perdas = st.radio(
+            "Distribuição de perdas",
+            ["Vasicek (analítico)", "Simulação do fluxo de caixa"],
+            key="m03_rating_fonte"
+        )
+    
+    analitico = fonte_perdas == "Vasicek (analítico)"
+    
+    with col_r2:
+        pd_horizonte = st.slider(
+            "PD Acumulada no Horizonte (%)", 1.0, 30.0, 10.0, 0.5,
+            disabled=not analitico, key="m03_rating_pd"
+        ) / 100
+    
+    with col_r3:
+        correlacao_rating = st.slider(
+            "Correlação de Ativos (ρ)", 0.01, 0.50, 0.15, 0.01,
+            disabled=not analitico, key="m03_rating_correlacao"
+        )
+    
+    with col_r4:
+        lgd_rating = st.slider(
+            "LGD (%)", 10.0, 100.0, 60.0, 5.0,
+            disabled=not analitico, key="m03_rating_lgd"
+        ) / 100
+    
+    if analitico:
+        distribuicao = distribuicao_perda_vasicek(pd_horizonte, correlacao_rating, lgd_rating)
+    else:
+        distribuicao = distribuicao_perda_empirica(perda_acumulada[:, -1])
+    
+    subordinacao_grade, perda_esperada_senior, ratings_senior = mapa_rating_senior(distribuicao)
+    
+    # Cotas da estrutura configurada (a Mezanino só entra se tiver espessura)
+    cotas_rating = [('Júnior', 0), ('Mezanino', 1), ('Sênior', 2)]
+    cotas_rating = [(nome, k) for nome, k in cotas_rating if espessuras[k] > 0]
+    indices = [k for _, k in cotas_rating]
+    
+    perda_esperada_cota, prob_primeira_perda = perda_esperada_cotas(
+        distribuicao, ligacao[indices] / pl_total, desligamento[indices] / pl_total
+    )
+    
+    df_rating = pd.DataFrame({
+        'Cota': [nome for nome, _ in cotas_rating],
+        'Ligação (% do PL)': ligacao[indices] / pl_total * 100,
+        'Desligamento (% do PL)': desligamento[indices] / pl_total * 100,
+        'Perda Esperada (%)': perda_esperada_cota * 100,
+        'Prob. de Primeira Perda (%)': prob_primeira_perda * 100,
+        'Rating Implícito': rating_implicito(perda_esperada_cota)
+    })
+    
+    col_rt1, col_rt2 = st.columns([1, 2])
+    
+    with col_rt1:
+        st.metric(
+            "Rating Implícito da Sênior",
+            df_rating['Rating Implícito'].iloc[-1],
+            f"Perda esperada de {perda_esperada_cota[-1] * 100:.4f}%",
+            delta_color="off"
+        )
+        st.dataframe(df_rating.round(4), hide_index=True, use_container_width=True)
+        
+        # Subordinação mínima para alguns degraus da escala (primeiro ponto do mapa que atinge o rating)
+        alvos = ['Aaa', 'Aa3', 'A3', 'Baa3', 'Ba3', 'B3']
+        minimos = []
+        for alvo in alvos:
+            atinge = perda_esperada_senior <= LIMITES_PERDA_ESPERADA[RATINGS.index(alvo)]
+            minimos.append(f"{subordinacao_grade[np.argmax(atinge)] * 100:.1f}%" if atinge.any() else "—")
+        st.markdown("**Subordinação mínima da Sênior por rating:**")
+        st.dataframe(pd.DataFrame({'Rating': alvos, 'Subordinação Mínima': minimos}), hide_index=True)
+    
+    with col_rt2:
+        fig_rating = go.Figure()
+        fig_rating.add_trace(go.Scatter(
+            x=subordinacao_grade * 100,
+            y=np.maximum(perda_esperada_senior, 1e-9) * 100,
+            mode='lines',
+            name='Perda Esperada da Sênior',
+            line=dict(color='#1f77b4', width=3),
+            customdata=ratings_senior,
+            hovertemplate='Subordinação: %{x:.1f}%<br>Perda esperada: %{y:.4f}%<br>Rating: %{customdata}<extra></extra>'
+        ))
+        
+        for alvo in alvos:
+            fig_rating.add_hline(
+                y=LIMITES_PERDA_ESPERADA[RATINGS.index(alvo)] * 100,
+                line_dash="dot", line_color="gray",
+                annotation_text=alvo, annotation_position="right"
+            )
+        
+        fig_rating.add_vline(
+            x=subordinacao_pct, line_dash="dash", line_color="red",
+            annotation_text=f"Atual: {subordinacao_pct}% ({df_rating['Rating Implícito'].iloc[-1]})",
+            annotation_position="top"
+        )
+        
+        fig_rating.update_layout(
+            title="Perda Esperada e Rating Implícito da Sênior por Nível de Subordinação",
+            xaxis_title="Subordinação (% do PL)",
+            yaxis_title="Perda Esperada da Sênior (%, escala log)",
+            yaxis_type="log",
+            xaxis_range=[0, 60],
+            height=500
+        )
+        st.plotly_chart(fig_rating, use_container_width=True)
+    
+    st.caption(
+        "Escala idealizada de perda esperada para horizonte de 5 anos (aproximação da tabela de Moody's), "
+        "usada apenas para fins didáticos. Na simulação, a distribuição é a da perda líquida acumulada "
+        "da carteira até o vencimento."
+    )
+    
+    # Monitoramento diário do índice de subordinação
+    st.markdown("---")
+    st.markdown("## 📅 Monitoramento Diário: Desenquadramento e Recomposição")
+    
+    st.write("""
+    O desenquadramento acima olha para uma única foto. Na prática, o administrador acompanha o índice 
+    de subordinação **todos os dias**: perdas o reduzem, o excesso de spread retido e a amortização da 
+    Sênior o recompõem. Simulamos milhares de trajetórias diárias e medimos com que frequência, quando e 
+    por quanto tempo o fundo fica desenquadrado. Yield, remuneração da Sênior e custos são os da simulação 
+    de fluxo de caixa acima.
+    """)
+    
+    col_d1, col_d2, col_d3, col_d4 = st.columns(4)
+    
+    with col_d1:
+        indice_minimo = st.slider(
+            "Índice Mínimo do Regulamento (%)", 5, 50, max(subordinacao_pct - 5, 5),
+            key="m03_monitor_minimo",
+            help="Abaixo dele, o fundo está desenquadrado"
+        ) / 100
+        anos_monitoramento = st.slider("Horizonte (anos)", 1, 3, 2, key="m03_monitor_anos")
+    
+    with col_d2:
+        perda_aa = st.slider("Perda Média (% a.a. da carteira)", 0.5, 15.0, 4.0, 0.5, key="m03_monitor_perda") / 100
+        volatilidade_perda = st.slider("Volatilidade da Taxa de Perda", 0.1, 1.5, 0.8, 0.1, key="m03_monitor_vol")
+    
+    with col_d3:
+        eventos_aa = st.slider("Defaults Concentrados (eventos/ano)", 0.0, 12.0, 2.0, 0.5, key="m03_monitor_eventos")
+        tamanho_evento = st.slider("Tamanho de cada Evento (% da carteira)", 0.1, 5.0, 1.0, 0.1, key="m03_monitor_tamanho") / 100
+    
+    with col_d4:
+        n_caminhos_monitor = st.select_slider(
+            "Trajetórias Simuladas", [1_000, 2_000, 5_000, 10_000], 5_000, key="m03_monitor_caminhos"
+        )
+        inicio_amortizacao = st.slider(
+            "Início da Amortização da Sênior (mês)", 0, 36, 12, 3, key="m03_monitor_amortizacao"
+        )
+    
+    dias_monitoramento = 252 * anos_monitoramento
+    
+    with st.spinner("Simulando trajetórias diárias..."):
+        indice_diario = simular_indice_subordinacao(
+            pl_total, senior_inicial, n_caminhos=n_caminhos_monitor, dias=dias_monitoramento,
+            semente=int(semente), yield_aa=yield_aa, senior_aa=taxa_senior, custos_aa=custos_aa,
+            perda_aa=perda_aa, volatilidade=volatilidade_perda, eventos_aa=eventos_aa,
+            tamanho_evento=tamanho_evento, inicio_amortizacao=inicio_amortizacao * 21
+        )
+    
+    primeiro_desenquadramento, dias_recomposicao, episodios = analisar_desenquadramentos(indice_diario, indice_minimo)
+    
+    desenquadrou = primeiro_desenquadramento >= 0
+    recompos = dias_recomposicao >= 0
+    
+    col_dm1, col_dm2, col_dm3, col_dm4 = st.columns(4)
+    
+    with col_dm1:
+        st.metric("Probabilidade de Desenquadramento", f"{desenquadrou.mean() * 100:.1f}%")
+    
+    with col_dm2:
+        st.metric(
+            "1º Desenquadramento (mediana)",
+            f"mês {np.median(primeiro_desenquadramento[desenquadrou]) / 21:.1f}" if desenquadrou.any() else "—"
+        )
+    
+    with col_dm3:
+        st.metric(
+            "Tempo até Recomposição (mediana)",
+            f"{np.median(dias_recomposicao[recompos]):.0f} dias úteis" if recompos.any() else "—"
+        )
+    
+    with col_dm4:
+        st.metric(
+            "Sem Recomposição no Horizonte",
+            f"{(desenquadrou & ~recompos).mean() * 100:.1f}%",
+            f"{episodios.mean():.2f} episódios por trajetória",
+            delta_color="off"
+        )
+    
+    col_dg1, col_dg2 = st.columns([3, 2])
+    
+    with col_dg1:
+        meses_diarios = np.arange(1, dias_monitoramento + 1) / 21
+        faixas_indice = np.percentile(indice_diario, [5, 50, 95], axis=0) * 100
+        
+        fig_indice = go.Figure()
+        fig_indice.add_trace(go.Scatter(x=meses_diarios, y=faixas_indice[2], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig_indice.add_trace(go.Scatter(
+            x=meses_diarios, y=faixas_indice[0], mode='lines', line=dict(width=0), fill='tonexty',
+            fillcolor='rgba(31, 119, 180, 0.2)', name='Intervalo 5%-95%'
+        ))
+        fig_indice.add_trace(go.Scatter(x=meses_diarios, y=faixas_indice[1], mode='lines', name='Mediana', line=dict(color='#1f77b4', width=3)))
+        
+        # Uma trajetória que desenquadrou, para ilustrar o evento e a recomposição
+        if desenquadrou.any():
+            exemplo = np.flatnonzero(desenquadrou)[0]
+            fig_indice.add_trace(go.Scatter(
+                x=meses_diarios, y=indice_diario[exemplo] * 100, mode='lines',
+                name='Trajetória com Desenquadramento', line=dict(color='#ff6b6b', width=1)
+            ))
+        
+        fig_indice.add_hline(
+            y=indice_minimo * 100, line_dash="dash", line_color="red",
+            annotation_text=f"Mínimo: {indice_minimo * 100:.0f}%"
+        )
+        fig_indice.update_layout(
+            title="Índice de Subordinação Diário",
+            xaxis_title="Mês", yaxis_title="Índice de Subordinação (%)",
+            yaxis_range=[0, min(100, float(faixas_indice[2].max()) + 10)], height=450
+        )
+        st.plotly_chart(fig_indice, use_container_width=True)
+    
+    with col_dg2:
+        fig_tempo = go.Figure()
+        if desenquadrou.any():
+            contagens, limites_mes = np.histogram(
+                primeiro_desenquadramento[desenquadrou] / 21, bins=np.arange(0, 12 * anos_monitoramento + 1)
+            )
+            fig_tempo.add_trace(go.Bar(
+                x=limites_mes[:-1] + 0.5, y=contagens / len(desenquadrou) * 100,
+                name='1º Desenquadramento', marker_color='#ff6b6b'
+            ))
+        fig_tempo.update_layout(
+            title="Quando Ocorre o 1º Desenquadramento",
+            xaxis_title="Mês", yaxis_title="% das Trajetórias", height=450
+        )
+        st.plotly_chart(fig_tempo, use_container_width=True)
+    
+    st.caption(
+        f"{n_caminhos_monitor:,} trajetórias × {dias_monitoramento} dias úteis. O índice é (ativos − Sênior) ÷ ativos; "
+        "o fator de crédito é um AR(1) diário e o patrimônio vem de somas acumuladas, sem laço nos dias. "
+        "Mudar o índice mínimo só refaz a detecção de eventos, não a simulação."
+    )
+    
+    # Grade de estresse
+    st.markdown("---")
+    st.markdown("## 🧪 Grade de Estresse: Subordinação × Perda × Mezanino")
+    
+    st.write("""
+    Em vez de testar um cenário por vez, a grade avalia **todas** as combinações de índice de subordinação 
+    (10% a 50%), perda da carteira (0% a 60%) e fração da subordinação alocada ao Mezanino (0% a 100%) 
+    em um único cálculo vetorizado. Cada painel fixa a fração do Mezanino.
+    """)
+    
+    col_e1, col_e2 = st.columns(2)
+    
+    with col_e1:
+        cota_estresse = st.radio(
+            "Cota analisada", ['Sênior', 'Mezanino', 'Júnior'], horizontal=True, key="m03_estresse_cota"
+        )
+    
+    with col_e2:
+        resolucao_estresse = st.select_slider(
+            "Pontos por eixo (subordinação e perda)", [50, 100, 200, 300], 200, key="m03_estresse_resolucao"
+        )
+    
+    subordinacoes_grade = np.linspace(0.10, 0.50, resolucao_estresse)
+    perdas_grade = np.linspace(0.0, 0.60, resolucao_estresse)
+    fracoes_mezanino = np.linspace(0.0, 1.0, 6)
+    
+    baixas_grade = grade_de_estresse(subordinacoes_grade, perdas_grade, fracoes_mezanino)
+    indice_cota = ['Júnior', 'Mezanino', 'Sênior'].index(cota_estresse)
+    
+    fig_estresse = make_subplots(
+        rows=2, cols=3, shared_xaxes=True, shared_yaxes=True,
+        subplot_titles=[f"Mezanino = {f * 100:.0f}% da subordinação" for f in fracoes_mezanino],
+        horizontal_spacing=0.04, vertical_spacing=0.12
+    )
+    
+    for m, fracao in enumerate(fracoes_mezanino):
+        linha, coluna = m // 3 + 1, m % 3 + 1
+        fig_estresse.add_trace(go.Heatmap(
+            x=perdas_grade * 100,
+            y=subordinacoes_grade * 100,
+            z=np.round(baixas_grade[:, :, m, indice_cota] * 100, 1),
+            coloraxis='coloraxis',
+            hovertemplate="Perda: %{x:.1f}%<br>Subordinação: %{y:.1f}%<br>Baixa: %{z:.1f}%<extra></extra>"
+        ), row=linha, col=coluna)
+        fig_estresse.add_trace(go.Scatter(
+            x=[perda_pct], y=[subordinacao_pct], mode='markers', showlegend=False,
+            marker=dict(size=10, color='white', symbol='star', line=dict(color='black', width=1)),
+            hovertemplate="Estrutura atual<extra></extra>"
+        ), row=linha, col=coluna)
+    
+    fig_estresse.update_layout(
+        title=f"Baixa da Cota {cota_estresse} (% do seu valor)",
+        coloraxis=dict(colorscale='Reds', cmin=0, cmax=100, colorbar=dict(title="Baixa (%)")),
+        height=650
+    )
+    fig_estresse.update_xaxes(title_text="Perda (% do PL)", row=2)
+    fig_estresse.update_yaxes(title_text="Subordinação (%)", col=1)
+    
+    st.plotly_chart(fig_estresse, use_container_width=True)
+    
+    st.caption(
+        f"{baixas_grade[..., 0].size:,} combinações × 3 cotas em uma única expressão broadcast. "
+        "Note que a baixa da Sênior é igual em todos os painéis: ela depende só da subordinação total. "
+        "A divisão entre Júnior e Mezanino muda apenas qual cota subordinada absorve a perda primeiro."
+    )
+    
     # Conceitos pedagógicos
     st.markdown("---")
     st.markdown("### 🎓 Conceitos-Chave")